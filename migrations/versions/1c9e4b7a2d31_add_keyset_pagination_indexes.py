@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: 1c9e4b7a2d31
+Revises: ee9d033654e7
+Create Date: 2026-10-18 09:12:04.318220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c9e4b7a2d31'
+down_revision: Union[str, None] = 'ee9d033654e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_created_at_uid', 'books', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_books_user_uid_created_at_uid', 'books', ['user_uid', 'created_at', 'uid'], unique=False)
+    op.create_index('ix_reviews_created_at_uid', 'reviews', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_tags_created_at_uid', 'tags', ['created_at', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tags_created_at_uid', table_name='tags')
+    op.drop_index('ix_reviews_created_at_uid', table_name='reviews')
+    op.drop_index('ix_books_user_uid_created_at_uid', table_name='books')
+    op.drop_index('ix_books_created_at_uid', table_name='books')
@@ -0,0 +1,30 @@
+"""add updated_at indexes
+
+Revision ID: 5d2e8f1b7c40
+Revises: 3f0a6d2c8e15
+Create Date: 2026-10-18 11:25:13.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8f1b7c40'
+down_revision: Union[str, None] = '3f0a6d2c8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_updated_at_uid', 'books', ['updated_at', 'uid'], unique=False)
+    op.create_index('ix_reviews_updated_at_uid', 'reviews', ['updated_at', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_updated_at_uid', table_name='reviews')
+    op.drop_index('ix_books_updated_at_uid', table_name='books')
@@ -0,0 +1,28 @@
+"""add reviews book_uid index
+
+Revision ID: 6a4c1e9d3b72
+Revises: 5d2e8f1b7c40
+Create Date: 2026-10-18 12:40:55.217036
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a4c1e9d3b72'
+down_revision: Union[str, None] = '5d2e8f1b7c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_reviews_book_uid', 'reviews', ['book_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_book_uid', table_name='reviews')
@@ -0,0 +1,53 @@
+"""add book review aggregates
+
+Revision ID: 7e3b9c5a1f86
+Revises: 6a4c1e9d3b72
+Create Date: 2026-10-18 14:03:21.660548
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3b9c5a1f86'
+down_revision: Union[str, None] = '6a4c1e9d3b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('review_count', postgresql.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', postgresql.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('avg_rating', postgresql.DOUBLE_PRECISION(), server_default='0', nullable=False))
+
+    # backfill from the existing reviews
+    op.execute(
+        """
+        UPDATE books
+        SET review_count = agg.review_count,
+            rating_sum = agg.rating_sum,
+            avg_rating = agg.rating_sum::double precision / agg.review_count
+        FROM (
+            SELECT book_uid, count(*) AS review_count, sum(rating) AS rating_sum
+            FROM reviews
+            WHERE book_uid IS NOT NULL
+            GROUP BY book_uid
+        ) AS agg
+        WHERE books.uid = agg.book_uid
+        """
+    )
+
+    op.create_index('ix_books_avg_rating_uid', 'books', ['avg_rating', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_avg_rating_uid', table_name='books')
+    op.drop_column('books', 'avg_rating')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
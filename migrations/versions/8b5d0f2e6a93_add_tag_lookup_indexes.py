@@ -0,0 +1,65 @@
+"""add tag lookup indexes
+
+Revision ID: 8b5d0f2e6a93
+Revises: 7e3b9c5a1f86
+Create Date: 2026-10-18 15:17:38.092715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b5d0f2e6a93'
+down_revision: Union[str, None] = '7e3b9c5a1f86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# every duplicated tag name points at its oldest tag
+DUPLICATE_TAGS = """
+    WITH ranked AS (
+        SELECT uid,
+               first_value(uid) OVER (PARTITION BY name ORDER BY created_at, uid) AS keep
+        FROM tags
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # merge duplicate tag names so the unique index can be built
+    op.execute(
+        DUPLICATE_TAGS
+        + """
+        INSERT INTO booktag (book_id, tag_id)
+        SELECT booktag.book_id, ranked.keep
+        FROM booktag JOIN ranked ON booktag.tag_id = ranked.uid
+        WHERE ranked.uid <> ranked.keep
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        DUPLICATE_TAGS
+        + """
+        DELETE FROM booktag USING ranked
+        WHERE booktag.tag_id = ranked.uid AND ranked.uid <> ranked.keep
+        """
+    )
+    op.execute(
+        DUPLICATE_TAGS
+        + """
+        DELETE FROM tags USING ranked
+        WHERE tags.uid = ranked.uid AND ranked.uid <> ranked.keep
+        """
+    )
+
+    op.create_index('ux_tags_name', 'tags', ['name'], unique=True)
+    op.create_index('ix_booktag_tag_id_book_id', 'booktag', ['tag_id', 'book_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booktag_tag_id_book_id', table_name='booktag')
+    op.drop_index('ux_tags_name', table_name='tags')
@@ -0,0 +1,51 @@
+"""make created_at not null
+
+Revision ID: 9c6e2a4f1d58
+Revises: 8b5d0f2e6a93
+Create Date: 2026-10-18 19:42:05.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c6e2a4f1d58'
+down_revision: Union[str, None] = '8b5d0f2e6a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# created_at is the keyset pagination column, a NULL one breaks the cursor
+# and drops the row from every page after the first. Rows missing it take
+# their last update, or the migration time when they have none either
+BACKFILL = {
+    'books': "coalesce(updated_at, now())",
+    'reviews': "coalesce(updated_at, now())",
+    'tags': "now()",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, value in BACKFILL.items():
+        op.execute(f"UPDATE {table} SET created_at = {value} WHERE created_at IS NULL")
+        op.alter_column(
+            table,
+            'created_at',
+            existing_type=postgresql.TIMESTAMP(),
+            nullable=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(BACKFILL):
+        op.alter_column(
+            table,
+            'created_at',
+            existing_type=postgresql.TIMESTAMP(),
+            nullable=True,
+        )
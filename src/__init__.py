@@ -1,11 +1,18 @@
 from fastapi import FastAPI, status
 from contextlib import asynccontextmanager
 
+from src.books.catalogue import catalogue
 from src.books.routes import book_router
 from src.auth.routes import auth_router
 from src.reviews.routes import review_router
 from src.tags.routes import tags_router
-from src.db.main import init_db
+from src.db.routes import db_router
+from src.access import access_log
+from src.auth.hashing import password_hasher
+from src.db.blocklist import token_blocklist
+from src.db.main import primary, replica_router
+from src.db.redis import close_redis
+from src.db.schema import check_schema
 
 from .errors import register_all_errors
 from .middleware import register_middleware
@@ -13,10 +20,21 @@ from .middleware import register_middleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    access_log.start()
     print("server is starting")
-    await init_db()
+    await check_schema()
+    await token_blocklist.start()
+    await replica_router.start()
+    await catalogue.start()
     yield
+    await catalogue.stop()
+    await replica_router.stop()
+    await token_blocklist.stop()
+    password_hasher.shutdown()
+    await primary.dispose()
+    await close_redis()
     print("server is stopped")
+    access_log.stop()
 
 
 version = "v1"
@@ -25,6 +43,7 @@ app = FastAPI(
     title="Bookly",
     description="A REST API for book review web service",
     version=version,
+    lifespan=lifespan,
     docs_url = f"/api/{version}/docs",
     contact = {
         "email": "dddd09399@gmail.com"
@@ -39,3 +58,4 @@ app.include_router(book_router, prefix=f"/api/{version}/books", tags=["books"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["reviews"])
 app.include_router(tags_router, prefix=f"/api/{version}/tags", tags=["tags"])
+app.include_router(db_router, prefix=f"/api/{version}/db", tags=["db"])
@@ -0,0 +1,128 @@
+import json
+import logging
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
+from typing import Dict, Optional
+
+from fastapi.requests import Request
+
+from src.config import Config
+
+ACCESS_LOGGER = "bookly.access"
+
+
+def _status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, built from the record's `access` dict"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            **record.access,
+        }
+
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never waits: when the queue is full the record is
+    dropped and counted instead"""
+
+    def __init__(self, queue: Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+
+        except Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # waiting is fine on shutdown, the listener is draining the queue
+        self.queue.put(self._sentinel)
+
+
+class AccessLog:
+    """Structured access log written off the event loop.
+
+    A request only builds a record and puts it on a bounded queue; a
+    listener thread formats it as JSON and writes it to stdout. When stdout
+    cannot keep up the queue fills and records are dropped, never waited
+    for, and the next record logged carries how many were lost. Each status
+    class is sampled at its rate from ACCESS_LOG_SAMPLE_RATES, 1 if unset.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], queue_size: int):
+        self.sample_rates = sample_rates
+        self.queue: Queue = Queue(queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self._listener: Optional[QueueListener] = None
+        self._reported_dropped = 0
+
+        self.logger = logging.getLogger(ACCESS_LOGGER)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def start(self) -> None:
+        if self._listener is None:
+            stream = logging.StreamHandler(sys.stdout)
+            stream.setFormatter(JSONFormatter())
+
+            self._listener = DrainingQueueListener(self.queue, stream)
+            self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def log(self, request: Request, status_code: int, duration_ns: int) -> None:
+        status_class = _status_class(status_code)
+        rate = self.sample_rates.get(status_class, 1.0)
+
+        if rate < 1.0 and random.random() >= rate:
+            return
+
+        entry = {
+            "client": f"{request.client.host}:{request.client.port}"
+            if request.client
+            else None,
+            "method": request.method,
+            "path": request.url.path,
+            "status": status_code,
+            "duration_ms": round(duration_ns / 1e6, 3),
+            "sample_rate": rate,
+        }
+
+        dropped = self.handler.dropped
+        if dropped > self._reported_dropped:
+            entry["dropped"] = dropped - self._reported_dropped
+
+        # handed straight to the handlers, skipping the caller lookup
+        # Logger.info would do
+        record = self.logger.makeRecord(
+            ACCESS_LOGGER, logging.INFO, __file__, 0, "access", None, None
+        )
+        record.access = entry
+        self.logger.handle(record)
+
+        if self.handler.dropped == dropped:
+            self._reported_dropped = dropped
+
+
+access_log = AccessLog(Config.ACCESS_LOG_SAMPLE_RATES, Config.ACCESS_LOG_QUEUE_SIZE)
@@ -6,9 +6,9 @@ from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
+from src.auth.token_cache import token_cache
 from src.auth.utils import decode_token
-from src.db.models import User
-from src.db.redis import check_jti_in_blocklist
+from src.db.blocklist import check_jti_in_blocklist
 from src.db.main import get_session
 from src.errors import (
     InvalidToken,
@@ -18,38 +18,58 @@ from src.errors import (
 
 )
 
+from .schemas import Principal
 from .service import UserService
 
 
 user_service = UserService()
 
 
-class TokenBearer(HTTPBearer):
+async def get_token_data(request: Request, token: str) -> dict:
+    """Decode, verify and blocklist-check `token` once per request.
 
-    def __init__(self, auto_error=True):
-        super().__init__(auto_error=auto_error)
+    A request usually passes through several bearer instances (the router's
+    RoleChecker and the route's own bearer), so the verified claims are kept
+    on request.state and reused by all of them. Across requests the decode
+    is served from the token cache, the blocklist is always checked.
+    """
 
-    async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
-        creds = await super().__call__(request)
+    verified = getattr(request.state, "verified_token", None)
 
-        token = creds.credentials
+    if verified is not None and verified[0] == token:
+        return verified[1]
 
+    token_data = token_cache.get(token)
+
+    if token_data is None:
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise InvalidToken()
 
-        if await check_jti_in_blocklist(token_data["jti"]):
-            raise InvalidToken()
+        token_cache.put(token, token_data)
 
-        self.verify_token_data(token_data)
+    if await check_jti_in_blocklist(token_data["jti"]):
+        raise InvalidToken()
 
-        return token_data
+    request.state.verified_token = (token, token_data)
+
+    return token_data
 
-    def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
 
-        return token_data is not None
+class TokenBearer(HTTPBearer):
+
+    def __init__(self, auto_error=True):
+        super().__init__(auto_error=auto_error)
+
+    async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
+        creds = await super().__call__(request)
+
+        token_data = await get_token_data(request, creds.credentials)
+
+        self.verify_token_data(token_data)
+
+        return token_data
 
     def verify_token_data(self, token_data):
         raise NotImplemented("Please override this method in childe clasess ")
@@ -69,13 +89,38 @@ class RefreshTokenBearer(TokenBearer):
             raise RefreshTokenRequired()
 
 
-async def get_current_user(
+async def get_current_principal(
     token_details: dict = Depends(AccessTokenBearer()),
     session: AsyncSession = Depends(get_session),
+) -> Principal:
+    """Who the caller is, straight from the verified access token claims"""
+
+    user_data = token_details["user"]
+    role = user_data.get("role")
+
+    # access tokens minted from refresh tokens issued before the role claim
+    # was added to them; the session only connects on this path
+    if role is None:
+        user = await user_service.get_user(user_data["user_uid"], session)
+
+        if user is None:
+            raise InvalidToken()
+
+        role = user.role
+
+    return Principal(uid=user_data["user_uid"], email=user_data["email"], role=role)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
 ):
-    user_email = token_details["user"]["email"]
+    """The caller's User row, without books and reviews.
+
+    Only for handlers that need more than the principal.
+    """
 
-    user = await user_service.get_user_by_email(user_email, session)
+    user = await user_service.get_user(principal.uid, session)
 
     return user
 
@@ -85,9 +130,9 @@ class RoleChecker:
 
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)):
+    async def __call__(self, principal: Principal = Depends(get_current_principal)):
 
-        if current_user.role in self.allowed_roles:
+        if principal.role in self.allowed_roles:
             return True
 
         raise InsufficientPermission()
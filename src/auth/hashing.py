@@ -0,0 +1,81 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import Config
+from src.errors import PasswordHasherBusy
+from src.metrics import Histogram
+
+from .utils import generate_password_hash, verify_password
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a fixed pool of threads.
+
+    bcrypt releases the GIL, so `workers` hashes run in parallel while the
+    loop keeps serving other requests. At most `max_pending` calls may be
+    running or queued; past that callers get PasswordHasherBusy (a 503)
+    straight away instead of queueing behind seconds of hashing.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.wait_time = Histogram()
+        self.hash_time = Histogram()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+
+    def _timed(self, func, *args) -> tuple:
+        started = time.perf_counter()
+        result = func(*args)
+
+        return started, time.perf_counter() - started, result
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        self.pending += 1
+        queued_at = time.perf_counter()
+
+        try:
+            started, elapsed, result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._timed, func, *args
+            )
+
+        finally:
+            self.pending -= 1
+
+        self.wait_time.observe(started - queued_at)
+        self.hash_time.observe(elapsed)
+
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_password_hash, password)
+
+    async def verify(self, password: str, hash: str) -> bool:
+        return await self._run(verify_password, password, hash)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "wait_time": self.wait_time.snapshot(),
+            "hash_time": self.hash_time.snapshot(),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS, max_pending=Config.PASSWORD_HASH_MAX_PENDING
+)
@@ -4,6 +4,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import timedelta, datetime
 
 from .schemas import (
+    Principal,
     UserCreateModel,
     UserResponseModel,
     UserLoginModel,
@@ -14,29 +15,29 @@ from .schemas import (
 from .service import UserService
 from .utils import (
     create_access_token,
-    verify_password,
     create_url_token,
     decode_url_token,
-    generate_password_hash
 )
+from .hashing import password_hasher
+from .token_cache import token_cache
 from .dependencies import (
     RefreshTokenBearer,
     AccessTokenBearer,
-    get_current_user,
+    get_current_principal,
     RoleChecker,
 )
 
-from src.db.main import get_session
-from src.db.redis import add_jti_to_blocklist
+from src.db.main import get_primary_session, get_session
+from src.db.blocklist import add_jti_to_blocklist, token_blocklist
 from src.errors import UserAlreadyExists, UserNotFound, InvalidToken, InvalidCredentials, AccountNotVerified
-from src.mail import mail, create_message
+from src.mail import create_message, get_mail, queue_email
 from src.config import Config
-from src.celery_tasks import send_email
 
 
 auth_router = APIRouter()
 user_service = UserService()
 role_checker = RoleChecker(["admin", "user"])
+admin_role_checker = Depends(RoleChecker(["admin"]))
 
 REFRESH_TOKEN_EXPIRY = 2
 
@@ -48,7 +49,7 @@ async def send_mail(emails: EmailModel):
     html = "<h1>Welcome to the app</h1>"
     subject = "Welcome to our app"
 
-    send_email.delay(emails, subject, html)
+    queue_email(emails, subject, html)
 
     return {"message": "Email sent successfully"}
 
@@ -77,7 +78,7 @@ async def create_user_account(
     emails = [email]
     subject = "Verify your email"
 
-    send_email.delay(emails, subject, html)
+    queue_email(emails, subject, html)
 
     return {
         "message": "Account Created! Check email to verify your account",
@@ -86,19 +87,21 @@ async def create_user_account(
 
 
 @auth_router.get("/verify/{token}")
-async def verify_user_account(token: str, session: AsyncSession = Depends(get_session)):
+async def verify_user_account(
+    token: str, session: AsyncSession = Depends(get_primary_session)
+):
     token_data = decode_url_token(token)
 
     user_email = token_data.get("email")
 
     if user_email:
-        user = await user_service.get_user_by_email(user_email, session)
+        user_uid = await user_service.update_user(
+            user_email, {"is_verified": True}, session
+        )
 
-        if not user:
+        if user_uid is None:
             raise UserNotFound()
 
-        await user_service.update_user(user, {"is_verified": True}, session)
-
         return JSONResponse(
             content={"message": "Account verified"},
             status_code=status.HTTP_200_OK,
@@ -128,7 +131,7 @@ async def login(
         raise AccountNotVerified()
 
     # Validate password
-    if not verify_password(password, user.password_hash):
+    if not await password_hasher.verify(password, user.password_hash):
         raise InvalidCredentials()
 
     # Create tokens
@@ -141,7 +144,7 @@ async def login(
     )
 
     refresh_token = create_access_token(
-        user_data={"email": user.email, "user_uid": str(user.uid)},
+        user_data={"email": user.email, "user_uid": str(user.uid), "role": user.role},
         refresh=True,
         expiry=timedelta(days=REFRESH_TOKEN_EXPIRY),
     )
@@ -176,11 +179,33 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 @auth_router.get("/me", response_model=UserBooksModel)
 async def get_current_user(
-    user=Depends(get_current_user), _: bool = Depends(role_checker)
+    principal: Principal = Depends(get_current_principal),
+    _: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_session),
 ):
+    user = await user_service.get_user(principal.uid, session, with_content=True)
+
+    if not user:
+        raise UserNotFound()
+
     return user
 
 
+@auth_router.get("/token-cache/stats", dependencies=[admin_role_checker])
+async def get_token_cache_stats():
+    return token_cache.stats()
+
+
+@auth_router.get("/blocklist/stats", dependencies=[admin_role_checker])
+async def get_blocklist_stats():
+    return token_blocklist.stats()
+
+
+@auth_router.get("/password-hasher/stats", dependencies=[admin_role_checker])
+async def get_password_hasher_stats():
+    return password_hasher.stats()
+
+
 @auth_router.get("/logout", status_code=status.HTTP_200_OK)
 async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     jti = token_details["jti"]
@@ -222,7 +247,7 @@ async def request_password_reset(
         subject="Password Reset Request", 
         body=html_message
     )
-    await mail.send_message(message)
+    await get_mail().send_message(message)
 
     return JSONResponse(
         content={"message": "Password reset link has been sent to your email"},
@@ -261,17 +286,15 @@ async def reset_password(
             detail="Passwords don't match"
         )
 
-    user = await user_service.get_user_by_email(user_email, session)
-    if not user:
-        raise UserNotFound()
-
     # Update password
-    new_password_hash = generate_password_hash(password_data.password)
-    await user_service.update_user(
-        user, 
+    new_password_hash = await password_hasher.hash(password_data.password)
+    user_uid = await user_service.update_user(
+        user_email, 
         {"password_hash": new_password_hash}, 
         session
     )
+    if user_uid is None:
+        raise UserNotFound()
 
     return JSONResponse(
         content={"message": "Password successfully reset"},
@@ -33,6 +33,14 @@ class UserBooksModel(UserResponseModel):
     reviews: List[ReviewResponseModel]
 
 
+class Principal(BaseModel):
+    """The caller as described by their access token, no database involved"""
+
+    uid: UUID
+    email: str
+    role: str
+
+
 class UserLoginModel(BaseModel):
     email: str = Field(max_length=40)
     password: str = Field(min_length=6)
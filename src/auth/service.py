@@ -1,21 +1,56 @@
+from datetime import datetime
+
+from sqlalchemy import lambda_stmt, update
+from sqlalchemy.orm import noload, selectinload
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
 from src.db.models import User
 from .schemas import UserCreateModel
-from .utils import generate_password_hash
+from .hashing import password_hasher
+
+
+# User.books and User.reviews are selectin by default, which costs a query
+# per collection and O(their content) rows on every lookup
+WITHOUT_CONTENT = (noload(User.books), noload(User.reviews))
+
+
+def user_by_email_statement(email: str):
+    return lambda_stmt(
+        lambda: select(User).where(User.email == email).options(*WITHOUT_CONTENT)
+    )
+
+
+def user_by_uid_statement(user_uid: str, with_content: bool = False):
+    if with_content:
+        return lambda_stmt(
+            lambda: select(User)
+            .where(User.uid == user_uid)
+            .options(selectinload(User.books), selectinload(User.reviews))
+        )
+
+    return lambda_stmt(
+        lambda: select(User).where(User.uid == user_uid).options(*WITHOUT_CONTENT)
+    )
 
 
 class UserService:
     async def get_user_by_email(self, email: str, session: AsyncSession):
-        stmt = select(User).where(User.email == email)
-
-        result = await session.exec(stmt)
+        result = await session.exec(user_by_email_statement(email))
 
-        user = result.first()
+        user = result.scalars().first()
 
         return user
 
+    async def get_user(
+        self, user_uid: str, session: AsyncSession, with_content: bool = False
+    ):
+        """Load a user by uid, with their books and reviews only if asked"""
+
+        result = await session.exec(user_by_uid_statement(user_uid, with_content))
+
+        return result.scalars().first()
+
     async def user_exists(self, email: str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
@@ -25,7 +60,7 @@ class UserService:
         user_data_dict = user_data.model_dump()
 
         new_user = User(**user_data_dict)
-        new_user.password_hash = generate_password_hash(user_data_dict["password"])
+        new_user.password_hash = await password_hasher.hash(user_data_dict["password"])
         new_user.role = "user"
 
         session.add(new_user)
@@ -40,11 +75,22 @@ class UserService:
 
         return new_user
     
-    async def update_user(self, user: User, user_data: dict, session: AsyncSession):
+    async def update_user(self, email: str, user_data: dict, session: AsyncSession):
+        """Update a user in a single UPDATE ... RETURNING, None if there is no such user"""
 
-        for k, v in user_data.items():
-            setattr(user, k, v)
+        stmt = (
+            update(User)
+            .where(User.email == email)
+            .values(**user_data, updated_at=datetime.now())
+            .returning(User.uid)
+            .execution_options(synchronize_session=False)
+        )
 
-        await session.commit()
+        result = await session.exec(stmt)
 
-        return user
+        user_uid = result.scalar_one_or_none()
+
+        if user_uid is not None:
+            await session.commit()
+
+        return user_uid
@@ -0,0 +1,78 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+TOKEN_CACHE_SIZE = 10000
+
+
+def _token_key(token: str) -> bytes:
+    # a fixed size digest, so the cache never holds on to the tokens themselves
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class TokenCache:
+    """Per-worker LRU of verified JWT claims.
+
+    Saves the signature check and JSON decode for tokens seen before. An
+    entry never outlives the token's `exp`, and the least recently used
+    entry is evicted once `max_size` tokens are held. Revocation is not
+    cached, callers still check the blocklist on every request.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        key = _token_key(token)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, token_data = entry
+
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return token_data
+
+    def put(self, token: str, token_data: dict) -> None:
+        if "exp" not in token_data:
+            return
+
+        key = _token_key(token)
+        self._entries[key] = (token_data["exp"], token_data)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+token_cache = TokenCache()
@@ -0,0 +1,126 @@
+import logging
+import uuid
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from src.db.redis import get_redis
+
+BOOK_CACHE_EXPIRY = 300
+# outlives any load that read the generation by far; an expired generation
+# reads as 0 and only ever stops a store
+BOOK_GENERATION_EXPIRY = 86400
+
+BOOK_CACHE_REQUESTS = "book_cache:requests"
+BOOK_CACHE_MISSES = "book_cache:misses"
+
+
+def _book_key(book_uid: str) -> str:
+    # every spelling postgres accepts for a uid maps to the one key that
+    # invalidate_book deletes
+    try:
+        book_uid = uuid.UUID(str(book_uid))
+
+    except ValueError:
+        pass
+
+    return f"book_cache:{str(book_uid).lower()}"
+
+
+def _generation_key(book_uid: str) -> str:
+    return f"{_book_key(book_uid)}:generation"
+
+
+# KEYS: book key, generation key
+# ARGV: generation read before the load, etag, payload, expiry
+STORE_SCRIPT = """
+    if tonumber(redis.call('GET', KEYS[2]) or 0) ~= tonumber(ARGV[1]) then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'etag', ARGV[2], 'payload', ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return 1
+"""
+
+
+@lru_cache(maxsize=1)
+def _store_script(client):
+    """STORE_SCRIPT registered once per client, like get_redis itself"""
+
+    return client.register_script(STORE_SCRIPT)
+
+
+async def get_cached_book(book_uid: str) -> Optional[Tuple[str, bytes]]:
+    """Return the ETag and serialised BookDetailModel of a book, or None on a miss"""
+
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.hmget(_book_key(book_uid), "etag", "payload")
+            pipe.incr(BOOK_CACHE_REQUESTS)
+            (etag, payload), _ = await pipe.execute()
+
+        if payload is None:
+            await get_redis().incr(BOOK_CACHE_MISSES)
+            return None
+
+        return etag.decode(), payload
+
+    except RedisError as e:
+        logging.warning("book cache unavailable: %s", e)
+        return None
+
+
+async def get_book_generation(book_uid: str) -> Optional[int]:
+    """How often the book was invalidated, read before loading it from the
+    database; None when the cache is unavailable"""
+
+    try:
+        return int(await get_redis().get(_generation_key(book_uid)) or 0)
+
+    except RedisError as e:
+        logging.warning("book cache unavailable: %s", e)
+        return None
+
+
+async def cache_book(book_uid: str, generation: int, etag: str, payload: bytes) -> None:
+    """Store a book loaded after reading `generation`, unless it was
+    invalidated since; the load may predate that change"""
+
+    try:
+        await _store_script(get_redis())(
+            keys=[_book_key(book_uid), _generation_key(book_uid)],
+            args=[generation, etag, payload, BOOK_CACHE_EXPIRY],
+        )
+
+    except RedisError as e:
+        logging.warning("book cache unavailable: %s", e)
+
+
+async def invalidate_book(book_uid: str) -> None:
+    """Drop the cached detail of a book, call this after every committed change"""
+
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.incr(_generation_key(book_uid))
+            pipe.expire(_generation_key(book_uid), BOOK_GENERATION_EXPIRY)
+            pipe.delete(_book_key(book_uid))
+            await pipe.execute()
+
+    except RedisError as e:
+        logging.warning("book cache unavailable: %s", e)
+
+
+async def get_book_cache_stats() -> dict:
+    requests, misses = await get_redis().mget(BOOK_CACHE_REQUESTS, BOOK_CACHE_MISSES)
+
+    requests = int(requests or 0)
+    misses = int(misses or 0)
+    hits = max(requests - misses, 0)
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / requests if requests else 0.0,
+        "ttl_seconds": BOOK_CACHE_EXPIRY,
+    }
@@ -0,0 +1,372 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import func, select
+
+from src.db.main import async_session
+from src.db.models import Book
+
+CATALOGUE_BATCH_SIZE = 10000
+CATALOGUE_REFRESH_SECONDS = 30
+# deleted books never show up in an updated_at scan, a periodic full
+# rebuild is what drops them from the snapshot
+CATALOGUE_REBUILD_SECONDS = 3600
+# updated_at is stamped before commit, a bulk import's whole transaction
+# earlier, so a row can become visible with a stamp below the watermark.
+# Updates rescan this far back; upserts are idempotent, and anything
+# an import running longer than that waits for the next rebuild
+CATALOGUE_OVERLAP = timedelta(minutes=10)
+
+PAGE_COUNT_BUCKETS = (0, 100, 200, 300, 500, 1000)
+MAX_PUBLISHER_FACETS = 20
+
+UID_DTYPE = "S16"
+
+
+class StringDictionary:
+    """Dictionary-encodes strings as dense int32 codes"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+
+        return code
+
+    def lookup(self, values: List[str]) -> np.ndarray:
+        return np.array([self.codes.get(value, -1) for value in values], np.int32)
+
+
+class CatalogueSnapshot:
+    """Columnar copy of the facetable book columns, one array per column.
+
+    Rows are kept sorted by uid, so incremental updates find existing books
+    with a binary search instead of a per-book python index. A full load
+    `reserve`s the columns once and `append`s its batches straight into them.
+    """
+
+    COLUMNS = ("language", "publisher", "page_count", "year", "created_at")
+
+    def __init__(self):
+        self.uids = np.empty(0, UID_DTYPE)
+        self.language = np.empty(0, np.int32)
+        self.publisher = np.empty(0, np.int32)
+        self.page_count = np.empty(0, np.int32)
+        self.year = np.empty(0, np.int16)
+        self.created_at = np.empty(0, "datetime64[us]")
+
+        self.languages = StringDictionary()
+        self.publishers = StringDictionary()
+        self.watermark: Optional[datetime] = None
+        # rows of a full load written so far, the columns may be longer
+        self._filled = 0
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    def _resize(self, size: int) -> None:
+        # in place, a snapshot under construction has no views into it
+        for name in ("uids",) + self.COLUMNS:
+            getattr(self, name).resize(size, refcheck=False)
+
+    def _columns(self, rows) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        count = len(rows)
+        uids = np.array([row.uid.bytes for row in rows], UID_DTYPE)
+        batch = {
+            "language": np.fromiter(
+                (self.languages.encode(row.language) for row in rows), np.int32, count
+            ),
+            "publisher": np.fromiter(
+                (self.publishers.encode(row.publisher) for row in rows), np.int32, count
+            ),
+            "page_count": np.fromiter((row.page_count for row in rows), np.int32, count),
+            "year": np.fromiter(
+                (row.published_date.year for row in rows), np.int16, count
+            ),
+            "created_at": np.array(
+                [row.created_at for row in rows], "datetime64[us]"
+            ),
+        }
+
+        updated_at = max((row.updated_at for row in rows if row.updated_at), default=None)
+        if updated_at is not None and (
+            self.watermark is None or updated_at > self.watermark
+        ):
+            self.watermark = updated_at
+
+        return uids, batch
+
+    def reserve(self, count: int) -> None:
+        """Allocate the columns of an empty snapshot for a full load of `count` rows"""
+
+        self._resize(count)
+        self._filled = 0
+
+    def append(self, rows) -> None:
+        """Write one batch of a full load, in uid order, after the rows before it"""
+
+        uids, batch = self._columns(rows)
+        start, end = self._filled, self._filled + len(uids)
+
+        if end > len(self.uids):
+            # books added since the count, grow like a list would
+            self._resize(max(end, 2 * len(self.uids)))
+
+        self.uids[start:end] = uids
+        for name in self.COLUMNS:
+            getattr(self, name)[start:end] = batch[name]
+
+        self._filled = end
+
+    def finish(self) -> None:
+        """Trim the columns to the rows loaded"""
+
+        self._resize(self._filled)
+
+        if np.any(self.uids[1:] <= self.uids[:-1]):
+            # the database ordered uids other than bytewise, sort here
+            # instead, one column copy at a time
+            order = np.argsort(self.uids)
+            for name in ("uids",) + self.COLUMNS:
+                setattr(self, name, getattr(self, name)[order])
+
+    def upsert(self, rows) -> None:
+        """Apply one batch of book rows, updating known books and adding new ones"""
+
+        uids, batch = self._columns(rows)
+
+        positions = np.searchsorted(self.uids, uids)
+        if len(self.uids):
+            found = self.uids[np.minimum(positions, len(self.uids) - 1)] == uids
+        else:
+            found = np.zeros(len(uids), bool)
+
+        for name in self.COLUMNS:
+            getattr(self, name)[positions[found]] = batch[name][found]
+
+        added = ~found
+        if added.any():
+            # merge the few new uids in, the snapshot itself is already sorted
+            order = np.argsort(uids[added])
+            new_uids = uids[added][order]
+            at = np.searchsorted(self.uids, new_uids)
+
+            self.uids = np.insert(self.uids, at, new_uids)
+            for name in self.COLUMNS:
+                column = np.insert(getattr(self, name), at, batch[name][added][order])
+                setattr(self, name, column)
+
+    def _mask(
+        self,
+        languages: Optional[List[str]],
+        publishers: Optional[List[str]],
+        min_pages: Optional[int],
+        max_pages: Optional[int],
+        decades: Optional[List[int]],
+    ) -> np.ndarray:
+        mask = np.ones(len(self), bool)
+
+        if languages:
+            mask &= np.isin(self.language, self.languages.lookup(languages))
+        if publishers:
+            mask &= np.isin(self.publisher, self.publishers.lookup(publishers))
+        if min_pages is not None:
+            mask &= self.page_count >= min_pages
+        if max_pages is not None:
+            mask &= self.page_count <= max_pages
+        if decades:
+            mask &= np.isin(self.year // 10 * 10, decades)
+
+        return mask
+
+    @staticmethod
+    def _counts(codes: np.ndarray, values: List[str]) -> Dict[str, int]:
+        counts = np.bincount(codes, minlength=len(values))
+
+        return {values[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def facets(self, mask: np.ndarray) -> Dict[str, Dict[str, int]]:
+        publishers = self._counts(self.publisher[mask], self.publishers.values)
+        top_publishers = sorted(publishers.items(), key=lambda item: -item[1])
+
+        buckets = np.digitize(self.page_count[mask], PAGE_COUNT_BUCKETS)
+        bucket_counts = np.bincount(buckets, minlength=len(PAGE_COUNT_BUCKETS) + 1)
+        bucket_labels = [
+            f"{low}-{high - 1}"
+            for low, high in zip(PAGE_COUNT_BUCKETS, PAGE_COUNT_BUCKETS[1:])
+        ] + [f"{PAGE_COUNT_BUCKETS[-1]}+"]
+
+        decades, decade_counts = np.unique(
+            self.year[mask] // 10 * 10, return_counts=True
+        )
+
+        return {
+            "language": self._counts(self.language[mask], self.languages.values),
+            "publisher": dict(top_publishers[:MAX_PUBLISHER_FACETS]),
+            "page_count": {
+                label: int(count)
+                for label, count in zip(bucket_labels, bucket_counts[1:])
+                if count
+            },
+            "decade": {
+                str(decade): int(count)
+                for decade, count in zip(decades, decade_counts)
+            },
+        }
+
+    def browse(self, limit: int, **filters) -> dict:
+        """Filter with boolean masks and return the newest matching uids and facets"""
+
+        mask = self._mask(**filters)
+        matched = np.flatnonzero(mask)
+
+        # newest first; NaT created_at sorts as the oldest. NaT casts to
+        # INT64_MIN already, but set it explicitly and never negate it, as
+        # -INT64_MIN wraps back round to INT64_MIN
+        created_at = self.created_at[matched]
+        created_at = np.where(
+            np.isnat(created_at),
+            np.iinfo(np.int64).min,
+            created_at.astype(np.int64),
+        )
+        if len(matched) > limit:
+            newest = np.argpartition(created_at, len(matched) - limit)[-limit:]
+        else:
+            newest = np.arange(len(matched))
+        newest = newest[np.argsort(created_at[newest], kind="stable")[::-1]]
+
+        uids = [
+            uuid.UUID(bytes=uid.ljust(16, b"\0")) for uid in self.uids[matched[newest]]
+        ]
+
+        return {"total": len(matched), "uids": uids, "facets": self.facets(mask)}
+
+
+class Catalogue:
+    """Owns the live snapshot and keeps it fresh in the background"""
+
+    def __init__(self):
+        self.snapshot: Optional[CatalogueSnapshot] = None
+        self.refreshed_at = 0.0
+        self.rebuilt_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _load(self, snapshot: CatalogueSnapshot, since: Optional[datetime]):
+        """Full load into a new snapshot when `since` is None, else an update.
+
+        A full load works on a snapshot no reader can see yet, so its numpy
+        work runs in a thread. Updates are small and go to the live
+        snapshot, so they stay on the event loop where no read sees them
+        half applied.
+        """
+
+        statement = select(
+            Book.uid,
+            Book.language,
+            Book.publisher,
+            Book.page_count,
+            Book.published_date,
+            Book.created_at,
+            Book.updated_at,
+        )
+
+        if since is None:
+            # uid order, the order the snapshot keeps, so batches go
+            # straight into place with no sort and no second copy
+            statement = statement.order_by(Book.uid)
+        else:
+            statement = statement.where(Book.updated_at >= since - CATALOGUE_OVERLAP)
+
+        # streamed in fixed batches so a refresh never holds the result set
+        async with async_session() as session:
+            if since is None:
+                count = (
+                    await session.exec(select(func.count()).select_from(Book))
+                ).one()
+                snapshot.reserve(count)
+
+            result = await session.stream(
+                statement.execution_options(yield_per=CATALOGUE_BATCH_SIZE)
+            )
+
+            async for rows in result.partitions():
+                if since is None:
+                    await asyncio.to_thread(snapshot.append, rows)
+                else:
+                    snapshot.upsert(rows)
+
+        if since is None:
+            await asyncio.to_thread(snapshot.finish)
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+
+            if (
+                self.snapshot is None
+                or self.snapshot.watermark is None
+                or now - self.rebuilt_at > CATALOGUE_REBUILD_SECONDS
+            ):
+                # built aside and swapped in, readers keep the old one meanwhile
+                snapshot = CatalogueSnapshot()
+                await self._load(snapshot, None)
+                self.snapshot = snapshot
+                self.rebuilt_at = now
+            else:
+                await self._load(self.snapshot, self.snapshot.watermark)
+
+            self.refreshed_at = now
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+
+        except Exception as e:
+            logging.exception(e)
+
+    async def start(self) -> None:
+        """Build the first snapshot in the background, ahead of the first browse"""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_in_background())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def get_snapshot(self) -> CatalogueSnapshot:
+        """Current snapshot; only the very first call waits for a load"""
+
+        if self.snapshot is None:
+            if self._task is not None and not self._task.done():
+                # the load `start` kicked off, rather than a second one
+                await asyncio.shield(self._task)
+
+            async with self._lock:
+                pass
+
+            if self.snapshot is None:
+                await self.refresh()
+
+        elif time.monotonic() - self.refreshed_at > CATALOGUE_REFRESH_SECONDS:
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._refresh_in_background())
+
+        return self.snapshot
+
+
+catalogue = Catalogue()
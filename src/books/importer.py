@@ -0,0 +1,258 @@
+import asyncio
+import csv
+import json
+import logging
+import uuid
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, List, Optional
+
+from pydantic import ValidationError
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.main import async_session
+from src.db.redis import get_redis
+from .schemas import BookCreateModel
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+IMPORT_FORMATS = (NDJSON, CSV)
+
+IMPORT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_JOB_EXPIRY = 86400
+# request bodies past this size are spooled to disk
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+IMPORT_READ_SIZE = 64 * 1024
+
+STAGING_TABLE = "book_import_staging"
+STAGING_COLUMNS = (
+    "uid",
+    "title",
+    "author",
+    "publisher",
+    "published_date",
+    "page_count",
+    "language",
+    "user_uid",
+    "created_at",
+    "updated_at",
+)
+
+
+def _job_key(job_id: str) -> str:
+    return f"book_import:{job_id}"
+
+
+async def get_import_job(job_id: str, user_uid: str) -> Optional[dict]:
+    """The job, if it exists and was started by `user_uid`"""
+
+    job = await get_redis().get(_job_key(job_id))
+
+    if job is None:
+        return None
+
+    job = json.loads(job)
+
+    return job if job.get("user_uid") == user_uid else None
+
+
+async def spool_body(body: AsyncIterator[bytes]) -> SpooledTemporaryFile:
+    """Buffer a request body so the import can run after the response is sent"""
+
+    spool = SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE)
+
+    async for chunk in body:
+        spool.write(chunk)
+
+    spool.seek(0)
+
+    return spool
+
+
+async def iter_spool(spool: SpooledTemporaryFile) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(spool.read, IMPORT_READ_SIZE):
+        yield chunk
+
+
+async def iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed request body into lines without buffering all of it"""
+
+    buffer = b""
+
+    async for chunk in body:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            yield line
+
+    if buffer:
+        yield buffer
+
+
+class BookImporter:
+    """Stream NDJSON or CSV books into the books table through COPY.
+
+    Rows are validated against BookCreateModel in chunks, copied into a
+    temporary staging table and merged into books from there, all in one
+    transaction. Progress and per-row errors are kept in redis under the
+    job id, which starts out `pending` so the caller can hand it back before
+    the import runs. CSV input needs a header row and one record per line.
+    """
+
+    def __init__(self, user_uid: str, content_type: str):
+        self.user_uid = uuid.UUID(user_uid)
+        self.content_type = content_type
+        self.job = {
+            "job_id": str(uuid.uuid4()),
+            "user_uid": user_uid,
+            "status": "pending",
+            "rows_received": 0,
+            "rows_imported": 0,
+            "rows_failed": 0,
+            "errors": [],
+        }
+
+    async def _save_job(self) -> None:
+        await get_redis().set(
+            name=_job_key(self.job["job_id"]),
+            value=json.dumps(self.job),
+            ex=IMPORT_JOB_EXPIRY,
+        )
+
+    def _add_error(self, row: int, errors: List[dict]) -> None:
+        self.job["rows_failed"] += 1
+
+        if len(self.job["errors"]) < MAX_REPORTED_ERRORS:
+            self.job["errors"].append({"row": row, "errors": errors})
+
+    def _to_record(self, book: BookCreateModel, now: datetime) -> tuple:
+        return (
+            uuid.uuid4(),
+            book.title,
+            book.author,
+            book.publisher,
+            book.published_date,
+            book.page_count,
+            book.language,
+            self.user_uid,
+            now,
+            now,
+        )
+
+    async def _books(
+        self, body: AsyncIterator[bytes]
+    ) -> AsyncIterator[Optional[BookCreateModel]]:
+        """Yield the validated book, or None if it was rejected, for every input row"""
+
+        header = None
+        row = 0
+
+        async for line in iter_lines(body):
+            line = line.rstrip(b"\r")
+
+            if not line.strip():
+                continue
+
+            if self.content_type == CSV and header is None:
+                header = next(csv.reader([line.decode()]))
+                continue
+
+            row += 1
+            self.job["rows_received"] += 1
+
+            try:
+                if self.content_type == NDJSON:
+                    book = BookCreateModel.model_validate_json(line)
+                else:
+                    values = next(csv.reader([line.decode()]))
+                    book = BookCreateModel.model_validate(dict(zip(header, values)))
+
+            except ValidationError as e:
+                self._add_error(row, json.loads(e.json(include_url=False)))
+                book = None
+
+            except (UnicodeDecodeError, csv.Error) as e:
+                self._add_error(row, [{"msg": str(e)}])
+                book = None
+
+            yield book
+
+    async def _copy_chunk(self, session: AsyncSession, records: List[tuple]) -> None:
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+        )
+
+        columns = ", ".join(STAGING_COLUMNS)
+        result = await session.exec(
+            text(
+                f"INSERT INTO books ({columns}) SELECT {columns} FROM {STAGING_TABLE} "
+                "ON CONFLICT (uid) DO NOTHING"
+            )
+        )
+        await session.exec(text(f"TRUNCATE {STAGING_TABLE}"))
+
+        self.job["rows_imported"] += result.rowcount
+
+    async def create_job(self) -> dict:
+        await self._save_job()
+
+        return self.job
+
+    async def run_spooled(self, spool: SpooledTemporaryFile) -> dict:
+        try:
+            return await self.run(iter_spool(spool))
+
+        finally:
+            spool.close()
+
+    async def run(self, body: AsyncIterator[bytes]) -> dict:
+        self.job["status"] = "running"
+        await self._save_job()
+
+        async with async_session() as session:
+            return await self._import(body, session)
+
+    async def _import(self, body: AsyncIterator[bytes], session: AsyncSession) -> dict:
+        try:
+            # running this through the session opens the transaction the
+            # staging table and the COPYs below belong to
+            await session.exec(
+                text(
+                    f"CREATE TEMP TABLE {STAGING_TABLE} "
+                    "(LIKE books INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+            )
+
+            records = []
+            now = datetime.now()
+
+            async for book in self._books(body):
+                if book is not None:
+                    records.append(self._to_record(book, now))
+
+                if len(records) >= IMPORT_CHUNK_SIZE:
+                    await self._copy_chunk(session, records)
+                    await self._save_job()
+                    records = []
+
+            if records:
+                await self._copy_chunk(session, records)
+
+            await session.commit()
+            self.job["status"] = "completed"
+
+        except Exception as e:
+            logging.exception(e)
+            await session.rollback()
+            self.job["status"] = "failed"
+            self.job["rows_imported"] = 0
+
+        await self._save_job()
+
+        return self.job
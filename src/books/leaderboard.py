@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.main import async_session, primary
+from src.db.models import Review
+from src.db.redis import close_redis, get_redis
+
+LEADERBOARD_KINDS = ("top", "trending")
+
+# top: bayesian average of the ratings given this ISO week, so one 4 star
+# review does not outrank fifty 3.9 star ones
+TOP_PRIOR_RATING = 2.5
+TOP_PRIOR_WEIGHT = 5
+TOP_WEEK_EXPIRY = 14 * 86400
+
+# trending: every review adds 2 ** ((created_at - epoch) / half life), so a
+# review is worth half as much as one posted TRENDING_HALF_LIFE later and the
+# set never has to be rewritten to decay. The epoch lives in redis: once new
+# weights pass 2 ** TRENDING_RESCALE_HALF_LIVES the update script moves it
+# forward and scales the set down to match, so scores never overflow.
+# TRENDING_EPOCH is only the epoch of a set that has none stored yet.
+TRENDING_EPOCH = datetime(2025, 1, 1)
+TRENDING_HALF_LIFE = timedelta(days=3)
+TRENDING_RESCALE_HALF_LIVES = 64
+TRENDING_KEY = "leaderboard:trending"
+TRENDING_EPOCH_KEY = "leaderboard:trending:epoch"
+
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+# KEYS: top zset, top counts, top sums, trending zset, trending epoch
+# ARGV: book uid, rating delta, count delta, prior rating, prior weight,
+#       top expiry, review delta (+1/-1), created_at seconds, default epoch
+#       seconds, half life seconds, rescale after half lives
+UPDATE_SCRIPT = """
+    local count = redis.call('HINCRBY', KEYS[2], ARGV[1], ARGV[3])
+    local total = redis.call('HINCRBYFLOAT', KEYS[3], ARGV[1], ARGV[2])
+    if count <= 0 then
+        redis.call('HDEL', KEYS[2], ARGV[1])
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        redis.call('ZREM', KEYS[1], ARGV[1])
+    else
+        local prior = tonumber(ARGV[4]) * tonumber(ARGV[5])
+        local score = (tonumber(total) + prior) / (count + tonumber(ARGV[5]))
+        redis.call('ZADD', KEYS[1], score, ARGV[1])
+    end
+    for i = 1, 3 do redis.call('EXPIRE', KEYS[i], ARGV[6]) end
+
+    local half_life = tonumber(ARGV[10])
+    local epoch = tonumber(redis.call('GET', KEYS[5]) or ARGV[9])
+    local age = (tonumber(ARGV[8]) - epoch) / half_life
+    if age > tonumber(ARGV[11]) then
+        local shift = math.floor(age)
+        redis.call('ZUNIONSTORE', KEYS[4], 1, KEYS[4], 'WEIGHTS', 2 ^ -shift)
+        redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', 0)
+        epoch = epoch + shift * half_life
+        age = age - shift
+    end
+    redis.call('SET', KEYS[5], string.format('%.6f', epoch))
+
+    local weight = tonumber(ARGV[7]) * 2 ^ age
+    local trending = redis.call('ZINCRBY', KEYS[4], string.format('%.17g', weight), ARGV[1])
+    if tonumber(trending) <= 0 then
+        redis.call('ZREM', KEYS[4], ARGV[1])
+    end
+"""
+
+
+@lru_cache(maxsize=1)
+def _update_script(client):
+    """UPDATE_SCRIPT registered once per client, like get_redis itself"""
+
+    return client.register_script(UPDATE_SCRIPT)
+
+
+def _seconds(when: datetime) -> float:
+    return (when - UNIX_EPOCH).total_seconds()
+
+
+def _week(when: datetime) -> str:
+    year, week, _ = when.isocalendar()
+
+    return f"{year}-W{week:02d}"
+
+
+def _top_keys(week: str) -> List[str]:
+    base = f"leaderboard:top:{week}"
+
+    return [base, f"{base}:count", f"{base}:sum"]
+
+
+async def _update(book_uid: str, rating: int, created_at: datetime, delta: int):
+    """Apply one review to both leaderboards atomically"""
+
+    await _update_script(get_redis())(
+        keys=[*_top_keys(_week(created_at)), TRENDING_KEY, TRENDING_EPOCH_KEY],
+        args=[
+            str(book_uid),
+            delta * rating,
+            delta,
+            TOP_PRIOR_RATING,
+            TOP_PRIOR_WEIGHT,
+            TOP_WEEK_EXPIRY,
+            delta,
+            _seconds(created_at),
+            _seconds(TRENDING_EPOCH),
+            TRENDING_HALF_LIFE.total_seconds(),
+            TRENDING_RESCALE_HALF_LIVES,
+        ],
+    )
+
+
+async def record_review(book_uid: str, rating: int, created_at: datetime) -> None:
+    """Add a committed review to the leaderboards, best effort"""
+
+    try:
+        await _update(book_uid, rating, created_at, 1)
+
+    # the review is committed already, nothing here may turn it into a 500
+    except Exception as e:
+        logging.warning("leaderboard update failed, rebuild to recover: %s", e)
+
+
+async def remove_review(book_uid: str, rating: int, created_at: datetime) -> None:
+    """Take a deleted review back out of the leaderboards, best effort"""
+
+    try:
+        await _update(book_uid, rating, created_at, -1)
+
+    except Exception as e:
+        logging.warning("leaderboard update failed, rebuild to recover: %s", e)
+
+
+async def get_leaderboard(kind: str, offset: int, limit: int) -> List[Tuple[str, float]]:
+    """Read one page of (book uid, score), best first"""
+
+    if kind == "trending":
+        key = TRENDING_KEY
+    else:
+        key = _top_keys(_week(datetime.now()))[0]
+
+    entries = await get_redis().zrevrange(
+        key, offset, offset + limit - 1, withscores=True
+    )
+
+    return [(uid.decode(), score) for uid, score in entries]
+
+
+async def rebuild_leaderboards(session: AsyncSession) -> None:
+    """Regenerate both leaderboards from the reviews table.
+
+    Sets are built under temporary keys and swapped in with RENAME, so
+    readers never see a half built leaderboard.
+    """
+
+    now = datetime.now()
+    week_start = datetime.combine(
+        (now - timedelta(days=now.weekday())).date(), datetime.min.time()
+    )
+
+    top = await session.exec(
+        select(Review.book_uid, func.count(Review.uid), func.sum(Review.rating))
+        .where(Review.book_uid.is_not(None), Review.created_at >= week_start)
+        .group_by(Review.book_uid)
+    )
+    top = top.all()
+
+    # reviews older than 20 half lives weigh under a millionth of a new one.
+    # Weighed from a fresh epoch of now, every weight is at most 1
+    epoch = now
+    age = func.extract("epoch", Review.created_at - epoch)
+    trending = await session.exec(
+        select(
+            Review.book_uid,
+            func.sum(func.power(2, age / TRENDING_HALF_LIFE.total_seconds())),
+        )
+        .where(
+            Review.book_uid.is_not(None),
+            Review.created_at >= now - 20 * TRENDING_HALF_LIFE,
+        )
+        .group_by(Review.book_uid)
+    )
+    trending = trending.all()
+
+    keys = [*_top_keys(_week(now)), TRENDING_KEY]
+    tmp_keys = [f"{key}:rebuild" for key in keys]
+
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.delete(*tmp_keys)
+
+        for book_uid, count, total in top:
+            book_uid = str(book_uid)
+            score = (total + TOP_PRIOR_RATING * TOP_PRIOR_WEIGHT) / (
+                count + TOP_PRIOR_WEIGHT
+            )
+            pipe.zadd(tmp_keys[0], {book_uid: score})
+            pipe.hset(tmp_keys[1], book_uid, count)
+            pipe.hset(tmp_keys[2], book_uid, total)
+
+        if trending:
+            pipe.zadd(
+                tmp_keys[3], {str(uid): float(score) for uid, score in trending}
+            )
+
+        for tmp_key, key in zip(tmp_keys, keys):
+            has_data = bool(trending) if key == TRENDING_KEY else bool(top)
+
+            if has_data:
+                pipe.rename(tmp_key, key)
+            else:
+                pipe.delete(key)
+
+        for key in keys[:3]:
+            pipe.expire(key, TOP_WEEK_EXPIRY)
+
+        pipe.set(TRENDING_EPOCH_KEY, f"{_seconds(epoch):.6f}")
+
+        await pipe.execute()
+
+
+async def _rebuild() -> None:
+    async with async_session() as session:
+        await rebuild_leaderboards(session)
+
+    await primary.dispose()
+    await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bookly leaderboards")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="regenerate from postgres"
+    )
+    args = parser.parse_args()
+
+    if args.rebuild:
+        asyncio.run(_rebuild())
@@ -1,45 +1,250 @@
-from typing import List
+from datetime import datetime
+from functools import partial
+from typing import List, Literal, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, BackgroundTasks, status, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.books.book_data import books
-from src.books.schemas import Book, BookCreateModel, BookUpdateModel, BookDetailModel
-from src.books.service import BookService
+from src.books.catalogue import catalogue
+from src.books.cache import (
+    cache_book,
+    get_book_cache_stats,
+    get_book_generation,
+    get_cached_book,
+)
+from src.books.importer import IMPORT_FORMATS, BookImporter, get_import_job, spool_body
+from src.books.leaderboard import get_leaderboard
+from src.books.schemas import (
+    Book,
+    BookCreateModel,
+    BookUpdateModel,
+    BookDetailModel,
+    BookImportJobModel,
+    BookBatchModel,
+    BookBatchRequestModel,
+    BookBrowseModel,
+    MAX_BATCH_SIZE,
+    LeaderboardModel,
+)
+from src.books.service import BookService, book_etag, parse_fields
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
-from src.db.main import get_session
-from src.errors import BookNotFound
+from src.db.export import NDJSON_MEDIA_TYPE, stream_ndjson
+from src.db.main import get_session, read_from_primary, wrote_recently
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+from src.errors import BookNotFound, ImportJobNotFound
+from src.etag import cache_headers, etag_matches, not_modified, page_etag
 
 
 role_checker = RoleChecker(["admin", "user"])
+admin_role_checker = Depends(RoleChecker(["admin"]))
 book_router = APIRouter(dependencies=[Depends(role_checker)])
 book_service = BookService()
 access_token_bearer = AccessTokenBearer()
 
+VERSION_FIELDS = ("uid", "updated_at")
+MAX_TAG_FILTERS = 10
 
-@book_router.get("/", response_model=List[Book])
+
+async def _conditional_list(
+    request: Request, response: Response, list_books, fields: Optional[str]
+):
+    """Serve a book list page with an ETag, answering 304 from a version-only query.
+
+    Only a request carrying If-None-Match runs the version query, selecting
+    just uid and updated_at for the same page, so a client that already has
+    the page never pays for the full select. Otherwise the page is read
+    once, with the version fields added to the projection for the ETag and
+    dropped from the items again.
+    """
+
+    if request.headers.get("if-none-match"):
+        etag = page_etag(await list_books(fields=",".join(VERSION_FIELDS)))
+
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        books = await list_books(fields=fields)
+    else:
+        requested = parse_fields(fields)
+        extra = [name for name in VERSION_FIELDS if name not in requested]
+
+        books = await list_books(
+            fields=",".join([*requested, *extra]) if extra else fields
+        )
+        etag = page_etag(books)
+
+        for item in books["items"]:
+            for name in extra:
+                del item[name]
+
+    if fields:
+        # partial items do not fit Book, so skip response_model validation
+        return JSONResponse(
+            content=jsonable_encoder(books), headers=cache_headers(etag)
+        )
+
+    response.headers.update(cache_headers(etag))
+    return books
+
+
+@book_router.get("/", response_model=Page[Book])
 async def get_all_books(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Literal["created_at", "rating"] = "created_at",
+    tag: Optional[List[str]] = Query(None, max_length=MAX_TAG_FILTERS),
+    tag_match: Literal["any", "all"] = "any",
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
 ):
-    books = await book_service.get_all_books(session)
-    return books
+    list_books = partial(
+        book_service.get_all_books,
+        session,
+        limit,
+        cursor,
+        sort=sort,
+        tags=tag,
+        tag_match=tag_match,
+    )
+
+    return await _conditional_list(request, response, list_books, fields)
 
 
-@book_router.get("/user-books", response_model=List[Book])
+@book_router.get("/user-books", response_model=Page[Book])
 async def get_user_books(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
 ):
     
     user_uid = token_details.get("user")["user_uid"]
     
-    books = await book_service.get_user_books(user_uid, session)
+    list_books = partial(
+        book_service.get_user_books, user_uid, session, limit, cursor
+    )
+
+    return await _conditional_list(request, response, list_books, fields)
+
+
+@book_router.get("/search", response_model=Page[Book])
+async def search_books(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    books = await book_service.search_books(q, session, limit, cursor)
+    etag = page_etag(books)
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers.update(cache_headers(etag))
     return books
 
 
+@book_router.get("/batch", response_model=BookBatchModel)
+async def get_books_batch(
+    ids: List[UUID] = Query(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    books = await book_service.get_books_by_uids(ids, session)
+    return books
+
+
+@book_router.post("/batch", response_model=BookBatchModel)
+async def post_books_batch(
+    batch_data: BookBatchRequestModel,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    books = await book_service.get_books_by_uids(batch_data.ids, session)
+    return books
+
+
+@book_router.get("/leaderboard", response_model=LeaderboardModel)
+async def get_books_leaderboard(
+    kind: Literal["top", "trending"] = "top",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    entries = await get_leaderboard(kind, offset, limit)
+
+    books = await book_service.get_books_by_uids(
+        [UUID(book_uid) for book_uid, _ in entries], session
+    )
+    books_by_uid = {str(book["uid"]): book for book in books["items"]}
+
+    # books deleted since they were ranked are skipped
+    items = [
+        {"score": score, "book": books_by_uid[book_uid]}
+        for book_uid, score in entries
+        if book_uid in books_by_uid
+    ]
+
+    return {"kind": kind, "items": items}
+
+
+@book_router.get("/browse", response_model=BookBrowseModel)
+async def browse_books(
+    language: Optional[List[str]] = Query(None, max_length=MAX_TAG_FILTERS),
+    publisher: Optional[List[str]] = Query(None, max_length=MAX_TAG_FILTERS),
+    min_pages: Optional[int] = Query(None, ge=0),
+    max_pages: Optional[int] = Query(None, ge=0),
+    decade: Optional[List[int]] = Query(None, max_length=MAX_TAG_FILTERS),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    snapshot = await catalogue.get_snapshot()
+    result = snapshot.browse(
+        limit,
+        languages=language,
+        publishers=publisher,
+        min_pages=min_pages,
+        max_pages=max_pages,
+        decades=decade,
+    )
+
+    # the snapshot may trail the table by one refresh, so counts are
+    # approximate and books deleted since are skipped
+    books = await book_service.get_books_by_uids(result["uids"], session)
+
+    return {
+        "total": result["total"],
+        "items": books["items"],
+        "facets": result["facets"],
+    }
+
+
+@book_router.get("/export", dependencies=[admin_role_checker])
+async def export_books(updated_since: Optional[datetime] = None):
+    stmt = book_service.export_books_statement(updated_since)
+
+    return StreamingResponse(
+        stream_ndjson(stmt, Book), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
 @book_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Book)
 async def create_a_book(
     book_data: BookCreateModel,
@@ -51,18 +256,105 @@ async def create_a_book(
     return new_book
 
 
+@book_router.post(
+    "/import",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=BookImportJobModel,
+)
+async def import_books(
+    request: Request,
+    bg_tasks: BackgroundTasks,
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Accept a bulk import and run it after responding, poll the job for progress"""
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Supported formats: {', '.join(IMPORT_FORMATS)}",
+        )
+
+    user_uid = token_details.get("user")["user_uid"]
+
+    importer = BookImporter(user_uid, content_type)
+    spool = await spool_body(request.stream())
+
+    try:
+        job = await importer.create_job()
+
+    except Exception:
+        spool.close()
+        raise
+
+    bg_tasks.add_task(importer.run_spooled, spool)
+
+    return job
+
+
+@book_router.get("/import/{job_id}", response_model=BookImportJobModel)
+async def get_book_import(
+    job_id: str,
+    token_details: dict = Depends(access_token_bearer),
+):
+    user_uid = token_details.get("user")["user_uid"]
+    job = await get_import_job(job_id, user_uid)
+
+    if job is None:
+        raise ImportJobNotFound()
+
+    return job
+
+
+@book_router.get("/cache/stats", dependencies=[admin_role_checker])
+async def get_cache_stats():
+    stats = await get_book_cache_stats()
+    return stats
+
+
 @book_router.get("/{book_uid}", response_model=BookDetailModel)
 async def get_book(
     book_uid: str,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
 ) -> dict:
-    book = await book_service.get_book(book_uid, session)
+    if request.headers.get("if-none-match"):
+        etag = await book_service.get_book_etag(book_uid, session)
 
-    if book:
-        return book
+        if etag is None:
+            raise BookNotFound()
+
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    # a client that just wrote must not be handed a payload cached before
+    # its write, and only the primary's rows are fresh enough to cache
+    cached = None if wrote_recently(request) else await get_cached_book(book_uid)
+
+    if cached is not None:
+        etag, payload = cached
     else:
-        raise BookNotFound()
+        # read before the load, so a change committed while it runs keeps
+        # the now stale copy out of the cache
+        generation = await get_book_generation(book_uid)
+        book = await book_service.get_book(book_uid, session)
+
+        if not book:
+            raise BookNotFound()
+
+        etag = book_etag(book)
+        payload = BookDetailModel.model_validate(
+            book, from_attributes=True
+        ).model_dump_json()
+
+        if generation is not None and read_from_primary(request):
+            await cache_book(book_uid, generation, etag, payload)
+
+    return Response(
+        content=payload, media_type="application/json", headers=cache_headers(etag)
+    )
 
 
 @book_router.patch("/{book_uid}", response_model=Book)
@@ -77,7 +369,7 @@ async def update_book(
     if updated_book is None:
         raise BookNotFound()
     else:
-        return update_book
+        return updated_book
 
 
 @book_router.delete("/{book_uid}", status_code=status.HTTP_204_NO_CONTENT)
@@ -89,6 +381,6 @@ async def delete_book(
     deleted_book = await book_service.delete_book(book_uid, session)
 
     if deleted_book is None:
-        return {}
-    else:
         raise BookNotFound()
+    else:
+        return None
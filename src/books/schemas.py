@@ -1,8 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 from src.reviews.schemas import ReviewResponseModel
 
@@ -16,6 +16,8 @@ class Book(BaseModel):
     page_count: int
     language: str
     user_uid: Optional[UUID]
+    review_count: int
+    avg_rating: float
     created_at: datetime
     updated_at: datetime
 
@@ -34,9 +36,50 @@ class BookCreateModel(BaseModel):
 
 
 class BookUpdateModel(BaseModel):
-    title: str
-    author: str
-    publisher: str
-    page_count: int
-    language: str
-    
+    title: Optional[str] = None
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    page_count: Optional[int] = None
+    language: Optional[str] = None
+
+
+MAX_BATCH_SIZE = 100
+
+
+class BookBatchRequestModel(BaseModel):
+    ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BookBatchModel(BaseModel):
+    items: List[Book]
+    missing: List[UUID]
+
+
+class LeaderboardEntryModel(BaseModel):
+    score: float
+    book: Book
+
+
+class LeaderboardModel(BaseModel):
+    kind: str
+    items: List[LeaderboardEntryModel]
+
+
+class BookBrowseModel(BaseModel):
+    total: int
+    items: List[Book]
+    facets: Dict[str, Dict[str, int]]
+
+
+class BookImportErrorModel(BaseModel):
+    row: int
+    errors: List[dict]
+
+
+class BookImportJobModel(BaseModel):
+    job_id: str
+    status: str
+    rows_received: int
+    rows_imported: int
+    rows_failed: int
+    errors: List[BookImportErrorModel]
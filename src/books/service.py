@@ -1,35 +1,269 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, desc
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import any_, bindparam, cast, delete, func, lambda_stmt, tuple_, update
+from sqlmodel import desc, select
 
 from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from uuid import UUID
 
-from src.db.models import Book
-from .schemas import BookCreateModel, BookUpdateModel
+from src.books.cache import invalidate_book
+from src.db.export import naive_utc
+from src.db.models import Book, BookTag, Review, Tag
+from src.db.pagination import (
+    DEFAULT_PAGE_SIZE,
+    decode_rank_cursor,
+    encode_rank_cursor,
+    paginate,
+)
+from src.errors import InvalidFields
+from src.etag import make_etag
+from .schemas import Book as BookSchema, BookCreateModel, BookUpdateModel
+
+BOOK_FIELDS = tuple(BookSchema.model_fields)
+
+# list sort orders and the column each one is keyed on
+SORT_KEYS = {"created_at": "created_at", "rating": "avg_rating"}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Parse a `?fields=uid,title` projection into a list of book columns"""
+
+    if not fields:
+        return list(BOOK_FIELDS)
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+
+    if not requested or any(name not in BOOK_FIELDS for name in requested):
+        raise InvalidFields()
+
+    return list(dict.fromkeys(requested))
+
+
+@lru_cache(maxsize=256)
+def book_columns_statement(columns: Tuple[str, ...]):
+    """select() of some book columns, built once per projection and reused"""
+
+    return select(*(getattr(Book, name) for name in columns))
+
+
+def book_by_uid_statement(book_uid: str):
+    return lambda_stmt(lambda: select(Book).where(Book.uid == book_uid))
+
+
+def tag_filter(tags: List[str], match: str = "any"):
+    """Books tagged with any (or all) of the tag names.
+
+    Resolved entirely from the unique tags.name index and the
+    booktag(tag_id, book_id) index, without touching the books heap.
+    """
+
+    tags = list(dict.fromkeys(tags))
+    tags_param = bindparam("tags", tags, type_=pg.ARRAY(pg.VARCHAR))
+
+    tagged = (
+        select(BookTag.book_id)
+        .join(Tag, Tag.uid == BookTag.tag_id)
+        .where(Tag.name == any_(tags_param))
+    )
+
+    if match == "all":
+        tagged = tagged.group_by(BookTag.book_id).having(
+            func.count(BookTag.tag_id) == len(tags)
+        )
+
+    return Book.uid.in_(tagged)
+
+
+def book_etag(book: Book) -> str:
+    """ETag of a BookDetailModel, matching the one from `get_book_etag`"""
+
+    reviews_updated_at = max(
+        (review.updated_at for review in book.reviews if review.updated_at),
+        default=None,
+    )
+
+    return make_etag(book.uid, book.updated_at, len(book.reviews), reviews_updated_at)
 
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        stmt = select(Book).order_by(desc(Book.created_at))
-        result = await session.exec(stmt)
-        books = result.all()
+    async def _list_books(
+        self,
+        stmt_filter,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str],
+        fields: List[str],
+        sort_key: str = "created_at",
+    ):
+        """Select only the requested columns, so no Book entity or relationship is loaded"""
+
+        # uid and the sort column build the page cursor, even if not returned
+        columns = tuple(dict.fromkeys([*fields, "uid", sort_key]))
+        stmt = book_columns_statement(columns)
+
+        if stmt_filter is not None:
+            stmt = stmt.where(stmt_filter)
+
+        page = await paginate(session, stmt, Book, limit, cursor, sort_key)
+        page["items"] = [
+            {name: row._mapping[name] for name in fields} for row in page["items"]
+        ]
+
+        return page
+
+    async def get_all_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        sort: str = "created_at",
+        tags: Optional[List[str]] = None,
+        tag_match: str = "any",
+    ):
+        stmt_filter = tag_filter(tags, tag_match) if tags else None
+
+        return await self._list_books(
+            stmt_filter, session, limit, cursor, parse_fields(fields), SORT_KEYS[sort]
+        )
+
+    async def get_user_books(
+        self,
+        user_uid: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+    ):
+        return await self._list_books(
+            Book.user_uid == user_uid, session, limit, cursor, parse_fields(fields)
+        )
+
+    def export_books_statement(self, updated_since: Optional[datetime] = None):
+        """Column-only select of every book, oldest change first"""
+
+        stmt = select(*(getattr(Book, name) for name in BOOK_FIELDS))
+
+        if updated_since is not None:
+            stmt = stmt.where(Book.updated_at >= naive_utc(updated_since))
+
+        return stmt.order_by(Book.updated_at, Book.uid)
+
+    async def search_books(
+        self,
+        q: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        """Full-text search over title, author and publisher, best match first"""
+
+        search_vector = Book.__table__.c.search_vector
+        query = func.websearch_to_tsquery("english", q)
+        rank = func.ts_rank(search_vector, query)
+
+        stmt = select(
+            *(getattr(Book, name) for name in BOOK_FIELDS), rank.label("rank")
+        ).where(search_vector.op("@@")(query))
+
+        if cursor is not None:
+            last_rank, last_uid = decode_rank_cursor(cursor)
+            stmt = stmt.where(tuple_(rank, Book.uid) < tuple_(last_rank, last_uid))
+
+        stmt = stmt.order_by(desc(rank), desc(Book.uid)).limit(limit + 1)
 
-        return books
-    
-    async def get_user_books(self, user_uid: str, session: AsyncSession):
-        stmt = select(Book).where(Book.user_uid == user_uid)
         result = await session.exec(stmt)
-        books = result.all()
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_rank_cursor(rows[-1].rank, rows[-1].uid)
+
+        items = [{name: row._mapping[name] for name in BOOK_FIELDS} for row in rows]
 
-        return books
+        return {"items": items, "next_cursor": next_cursor}
 
     async def get_book(self, book_uid: str, session: AsyncSession):
-        stmt = select(Book).where(Book.uid == book_uid)
-        result = await session.exec(stmt)
+        result = await session.exec(book_by_uid_statement(book_uid))
 
-        book = result.first()
+        book = result.scalars().first()
 
         return book if book is not None else None
 
+    async def get_books_by_uids(self, book_uids: List[UUID], session: AsyncSession):
+        """Fetch many books with one `uid = ANY(:ids)` query, in request order.
+
+        Unknown uids are returned in `missing` instead of failing the batch.
+        """
+
+        book_uids = list(dict.fromkeys(book_uids))
+
+        uids_param = bindparam("book_uids", book_uids, type_=pg.ARRAY(pg.UUID))
+
+        stmt = select(*(getattr(Book, name) for name in BOOK_FIELDS)).where(
+            Book.uid == any_(uids_param)
+        )
+        result = await session.exec(stmt)
+
+        found = {row.uid: dict(row._mapping) for row in result.all()}
+
+        return {
+            "items": [found[uid] for uid in book_uids if uid in found],
+            "missing": [uid for uid in book_uids if uid not in found],
+        }
+
+    async def apply_review_to_book(
+        self, book_uid: str, rating: int, delta: int, session: AsyncSession
+    ) -> None:
+        """Add (delta=1) or remove (delta=-1) a review's rating from the book aggregates.
+
+        Runs in the caller's transaction, so the aggregates commit together
+        with the review itself.
+        """
+
+        review_count = Book.review_count + delta
+        rating_sum = Book.rating_sum + delta * rating
+
+        stmt = (
+            update(Book)
+            .where(Book.uid == book_uid)
+            .values(
+                review_count=review_count,
+                rating_sum=rating_sum,
+                avg_rating=func.coalesce(
+                    cast(rating_sum, pg.DOUBLE_PRECISION) / func.nullif(review_count, 0),
+                    0,
+                ),
+                updated_at=datetime.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        await session.exec(stmt)
+
+    async def get_book_etag(self, book_uid: str, session: AsyncSession):
+        """Version a book and its reviews without loading either of them"""
+
+        stmt = (
+            select(
+                Book.uid,
+                Book.updated_at,
+                func.count(Review.uid),
+                func.max(Review.updated_at),
+            )
+            .outerjoin(Review, Review.book_uid == Book.uid)
+            .where(Book.uid == book_uid)
+            .group_by(Book.uid, Book.updated_at)
+        )
+        result = await session.exec(stmt)
+
+        version = result.first()
+
+        return make_etag(*version) if version is not None else None
+
     async def create_book(
         self, book_create_data: BookCreateModel, user_uid: str, session: AsyncSession
     ):
@@ -47,26 +281,60 @@ class BookService:
     async def update_book(
         self, book_uid: str, book_update_data: BookUpdateModel, session: AsyncSession
     ):
-        book_to_update = await self.get_book(book_uid, session)
-        update_data_dict = book_update_data.model_dump()
-
-        if book_to_update is not None:
-            for k, v in update_data_dict.items():
-                setattr(book_to_update, k, v)
-            book_to_update.updated_at = datetime.now()
-        else:
+        """Update only the supplied fields with a single UPDATE ... RETURNING"""
+
+        update_data_dict = book_update_data.model_dump(
+            exclude_unset=True, exclude_none=True
+        )
+
+        stmt = (
+            update(Book)
+            .where(Book.uid == book_uid)
+            .values(**update_data_dict, updated_at=datetime.now())
+            .returning(*(getattr(Book, name) for name in BOOK_FIELDS))
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.exec(stmt)
+
+        updated_book = result.first()
+
+        if updated_book is None:
             return None
 
         await session.commit()
+        await invalidate_book(book_uid)
 
-        return book_to_update
+        return dict(updated_book._mapping)
 
     async def delete_book(self, book_uid: str, session: AsyncSession):
-        book_to_delete = await self.get_book(book_uid, session)
+        """Delete a book in one statement, returning its uid or None if it did not exist.
 
-        if book_to_delete is not None:
-            await session.delete(book_to_delete)
-            await session.commit()
+        Its tag links are deleted and its reviews detached in data-modifying
+        CTEs of the same statement, which is what the ORM cascade used to do
+        with several round trips.
+        """
+
+        stmt = (
+            delete(Book)
+            .where(Book.uid == book_uid)
+            .returning(Book.uid)
+            .add_cte(
+                delete(BookTag).where(BookTag.book_id == book_uid).cte("deleted_tags"),
+                update(Review)
+                .where(Review.book_uid == book_uid)
+                .values(book_uid=None)
+                .cte("detached_reviews"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.exec(stmt)
 
-        else:
+        deleted_uid = result.scalar_one_or_none()
+
+        if deleted_uid is None:
             return None
+
+        await session.commit()
+        await invalidate_book(book_uid)
+
+        return deleted_uid
@@ -1,7 +1,7 @@
 from celery import Celery
 from asgiref.sync import async_to_sync
 
-from src.mail import mail, create_message
+from src.mail import create_message, get_mail
 
 
 c_app = Celery()
@@ -13,5 +13,5 @@ c_app.config_from_object("src.config")
 def send_email(recipients: list[str], subject: str, body: str):
     message = create_message(recipients=recipients, subject=subject, body=body)
 
-    async_to_sync(mail.send_message)(message)
+    async_to_sync(get_mail().send_message)(message)
     print("Email sent")
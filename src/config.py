@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,6 +17,23 @@ class Settings(BaseSettings):
     MAIL_SERVER: str
     MAIL_FROM_NAME: str
     DOMAIN: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_PGBOUNCER: bool = False
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    REPLICA_CHECK_SECONDS: float = 1
+    REPLICA_CHECK_TIMEOUT_SECONDS: float = 2
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # fraction of requests logged per status class, e.g. {"2xx": 0.1}
+    ACCESS_LOG_SAMPLE_RATES: Dict[str, float] = {}
+    ACCESS_LOG_QUEUE_SIZE: int = 10000
 
     model_config = SettingsConfigDict(
         env_file = '.env',
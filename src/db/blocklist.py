@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Iterator, Optional
+
+from src.db.redis import get_redis
+
+JTI_EXPIRY = 360
+
+# every revoked jti, scored by when its blocklist entry expires, so a worker
+# can rebuild its filter without scanning the keyspace
+REVOKED_KEY = "blocklist:revoked"
+REVOKED_CHANNEL = "blocklist:revoked"
+
+BLOCKLIST_CAPACITY = 100000
+BLOCKLIST_ERROR_RATE = 0.001
+# bloom filters cannot forget, expired jtis are dropped by rebuilding
+BLOCKLIST_REBUILD_SECONDS = 600
+# the subscription is pinged this often, and counts as stalled once
+# nothing, pong included, has arrived for BLOCKLIST_STALE_SECONDS
+BLOCKLIST_PING_SECONDS = 5
+BLOCKLIST_STALE_SECONDS = 15
+
+
+class BloomFilter:
+    """Fixed size bloom filter over strings, sized for `capacity` items"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def estimated_error_rate(self) -> float:
+        bits_set = int.from_bytes(self.bits, "little").bit_count()
+
+        return (bits_set / self.size) ** self.hashes
+
+
+class TokenBlocklist:
+    """Per-worker bloom filter in front of the redis blocklist.
+
+    Almost no token is revoked, so a jti the filter has never seen is
+    answered locally and only filter positives cost a redis GET. Workers
+    learn about revocations through pub/sub and rebuild the filter from
+    REVOKED_KEY on startup and every BLOCKLIST_REBUILD_SECONDS. Whenever the
+    subscription is down, or has gone quiet past BLOCKLIST_STALE_SECONDS in
+    spite of the pings, every check goes to redis, so a missed message can
+    never let a revoked token through.
+    """
+
+    def __init__(
+        self,
+        capacity: int = BLOCKLIST_CAPACITY,
+        error_rate: float = BLOCKLIST_ERROR_RATE,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter = BloomFilter(capacity, error_rate)
+        self.ready = False
+        self.rebuilt_at = 0.0
+        self.last_message_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        self.checks = 0
+        self.filter_positives = 0
+        self.false_positives = 0
+
+    async def _rebuild(self) -> None:
+        jtis = await get_redis().zrangebyscore(REVOKED_KEY, time.time(), "+inf")
+
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti.decode())
+
+        self.filter = bloom
+        self.rebuilt_at = time.monotonic()
+
+    def _live(self) -> bool:
+        return (
+            self.ready
+            and time.monotonic() - self.last_message_at < BLOCKLIST_STALE_SECONDS
+        )
+
+    async def _listen(self) -> None:
+        async with get_redis().pubsub() as pubsub:
+            # subscribe before reading the set, so nothing revoked in
+            # between is missed
+            await pubsub.subscribe(REVOKED_CHANNEL)
+            await self._rebuild()
+
+            self.last_message_at = pinged_at = time.monotonic()
+            self.ready = True
+
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                now = time.monotonic()
+
+                if message is not None:
+                    self.last_message_at = now
+
+                    if message["type"] == "message":
+                        self.filter.add(message["data"].decode())
+
+                if now - self.last_message_at > BLOCKLIST_STALE_SECONDS:
+                    logging.warning("blocklist subscription stalled, reconnecting")
+                    return
+
+                if now - pinged_at > BLOCKLIST_PING_SECONDS:
+                    await pubsub.ping()
+                    pinged_at = now
+
+                if (
+                    now - self.rebuilt_at > BLOCKLIST_REBUILD_SECONDS
+                    or self.filter.count > self.filter.capacity
+                ):
+                    await self._rebuild()
+
+    async def _sync(self) -> None:
+        while True:
+            try:
+                await self._listen()
+
+            except Exception as e:
+                logging.warning("blocklist sync lost, checking redis directly: %s", e)
+
+            finally:
+                self.ready = False
+
+            await asyncio.sleep(1)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self.ready = False
+
+    async def add(self, jti: str) -> None:
+        now = time.time()
+
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+            pipe.zadd(REVOKED_KEY, {jti: now + JTI_EXPIRY})
+            pipe.zremrangebyscore(REVOKED_KEY, "-inf", now)
+            pipe.publish(REVOKED_CHANNEL, jti)
+            await pipe.execute()
+
+        self.filter.add(jti)
+
+    async def contains(self, jti: str) -> bool:
+        if not self._live():
+            return await get_redis().get(jti) is not None
+
+        self.checks += 1
+
+        if jti not in self.filter:
+            return False
+
+        self.filter_positives += 1
+        revoked = await get_redis().get(jti) is not None
+
+        if not revoked:
+            self.false_positives += 1
+
+        return revoked
+
+    def stats(self) -> dict:
+        negatives = self.checks - (self.filter_positives - self.false_positives)
+
+        return {
+            "ready": self._live(),
+            "items": self.filter.count,
+            "size_bits": self.filter.size,
+            "hashes": self.filter.hashes,
+            "checks": self.checks,
+            "filter_positives": self.filter_positives,
+            "false_positives": self.false_positives,
+            "false_positive_rate": self.false_positives / negatives if negatives else 0.0,
+            "estimated_false_positive_rate": self.filter.estimated_error_rate(),
+        }
+
+
+token_blocklist = TokenBlocklist()
+
+
+async def add_jti_to_blocklist(jti: str) -> None:
+    await token_blocklist.add(jti)
+
+
+async def check_jti_in_blocklist(jti: str) -> bool:
+    return await token_blocklist.contains(jti)
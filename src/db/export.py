@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Type
+
+from pydantic import BaseModel
+
+from src.db.main import async_session
+
+EXPORT_BATCH_SIZE = 1000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored without a time zone, so an aware filter value
+    like `...Z` is converted to naive UTC before asyncpg binds it"""
+
+    if value.tzinfo is None:
+        return value
+
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def stream_ndjson(
+    statement, schema: Type[BaseModel], batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncGenerator[bytes, None]:
+    """Stream the rows of `statement` as NDJSON from a server-side cursor.
+
+    Rows are fetched `batch_size` at a time, so memory stays constant and
+    the next batch is only fetched once the client has taken the previous
+    one. The generator owns its session because the request scoped one is
+    closed before a streaming response starts sending.
+    """
+
+    async with async_session() as session:
+        result = await session.stream(
+            statement.execution_options(yield_per=batch_size)
+        )
+
+        async for rows in result.partitions():
+            yield "".join(
+                schema.model_validate(row, from_attributes=True).model_dump_json()
+                + "\n"
+                for row in rows
+            ).encode()
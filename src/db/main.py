@@ -1,27 +1,299 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import logging
+import time
+from typing import AsyncGenerator, List, Optional
+from uuid import uuid4
 
-from sqlmodel import text, SQLModel
+from fastapi import Request, Response
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
 
 from src.config import Config
+from src.metrics import Histogram
 
-async_engine = create_async_engine(Config.DATABASE_URL)
 
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long every checkout waited and how many
+    gave up after pool_timeout"""
 
-async def init_db():
-    async with async_engine.begin() as conn:
-        from src.db.models import Book
+    wait_time = Histogram()
+    timeouts = 0
 
-        await conn.run_sync(SQLModel.metadata.create_all)
-        print("DB creation successful")
+    def _do_get(self):
+        started = time.perf_counter()
 
+        try:
+            return super()._do_get()
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
+        except exc.TimeoutError:
+            InstrumentedPool.timeouts += 1
+            raise
+
+        finally:
+            InstrumentedPool.wait_time.observe(time.perf_counter() - started)
+
+
+POOL_OPTIONS = {
+    "pool_size": Config.DB_POOL_SIZE,
+    "max_overflow": Config.DB_MAX_OVERFLOW,
+    "pool_timeout": Config.DB_POOL_TIMEOUT,
+    "pool_recycle": Config.DB_POOL_RECYCLE,
+    "pool_pre_ping": Config.DB_POOL_PRE_PING,
+    "query_cache_size": Config.DB_QUERY_CACHE_SIZE,
+}
+
+
+def _connect_args() -> dict:
+    if Config.DB_PGBOUNCER:
+        # transaction pooling hands every transaction a different server
+        # connection, so statements prepared on one are unknown on the next.
+        # Nothing is cached and every prepared statement gets a unique name.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return {"prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE}
+
+
+POOL_OPTIONS["connect_args"] = _connect_args()
+
+
+class Database:
+    """An engine and its session factory, created on first use.
+
+    Nothing connects, or even loads the driver, until the first session is
+    opened, so importing the app stays cheap. The lifespan disposes of it.
+    """
+
+    def __init__(self, url: str, **engine_options):
+        self.url = url
+        self.engine_options = engine_options
+        self._engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[async_sessionmaker] = None
+
+    def _create(self) -> None:
+        self._engine = create_async_engine(
+            self.url, **POOL_OPTIONS, **self.engine_options
+        )
+        self._sessionmaker = async_sessionmaker(
+            bind=self._engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._create()
+
+        return self._engine
+
+    def session(self) -> AsyncSession:
+        if self._sessionmaker is None:
+            self._create()
+
+        return self._sessionmaker()
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._sessionmaker = None
+
+
+primary = Database(Config.DATABASE_URL, poolclass=InstrumentedPool)
+
+
+def async_session() -> AsyncSession:
+    """A new session on the primary"""
+
+    return primary.session()
+
+
+READ_METHODS = ("GET", "HEAD")
+
+# set on every successful write so the same client reads its own writes
+LAST_WRITE_COOKIE = "bookly_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+# past twice the allowed lag every usable replica has caught up anyway
+LAST_WRITE_WINDOW = int(2 * Config.REPLICA_MAX_LAG_SECONDS) + 1
+
+# time since the last replayed commit only counts as lag while WAL is still
+# waiting to be replayed; a caught up replica of an idle primary has none
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class Replica(Database):
+    def __init__(self, url: str):
+        super().__init__(url)
+        self.healthy = False
+        self.lag: Optional[float] = None
+        # wall clock time up to which the replica is known to have replayed
+        self.replayed_until = 0.0
+
+    async def _lag(self) -> float:
+        async with self.engine.connect() as conn:
+            return float((await conn.execute(REPLICA_LAG_QUERY)).scalar_one())
+
+    async def check(self) -> None:
+        # any failure, a hung connection included, takes the replica out of
+        # rotation; nothing may escape and stop the monitor
+        try:
+            lag = await asyncio.wait_for(
+                self._lag(), timeout=Config.REPLICA_CHECK_TIMEOUT_SECONDS
+            )
+
+        except Exception as e:
+            logging.warning("replica %s unavailable: %r", self.engine.url.host, e)
+            self.healthy = False
+            return
+
+        self.lag = lag
+        self.replayed_until = time.time() - lag
+        self.healthy = lag <= Config.REPLICA_MAX_LAG_SECONDS
+
+
+class ReplicaRouter:
+    """Spreads read sessions over the replicas in DATABASE_REPLICA_URLS.
+
+    Picks the replica with the fewest checked out connections, round robin
+    between equals. Replicas lagging more than REPLICA_MAX_LAG_SECONDS, or
+    behind the client's last write, are skipped; with none left the read
+    goes to the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self, last_write: float = 0.0) -> Optional[Replica]:
+        candidates = [
+            replica
+            for replica in self.replicas
+            if replica.healthy and replica.replayed_until >= last_write
+        ]
+
+        if not candidates:
+            return None
+
+        start = next(self._next) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+
+        return min(rotated, key=lambda replica: replica.engine.pool.checkedout())
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.gather(*(replica.check() for replica in self.replicas))
+            await asyncio.sleep(Config.REPLICA_CHECK_SECONDS)
+
+    async def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def stats(self) -> list:
+        return [
+            {
+                "host": replica.engine.url.host,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag,
+                "checked_out": replica.engine.pool.checkedout(),
+                "idle": replica.engine.pool.checkedin(),
+            }
+            for replica in self.replicas
+        ]
+
+
+replica_router = ReplicaRouter(Config.DATABASE_REPLICA_URLS)
+
+
+def _last_write(request: Request) -> float:
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(
+        LAST_WRITE_COOKIE
+    )
+
+    try:
+        return float(value) if value else 0.0
+
+    except ValueError:
+        return 0.0
+
+
+def mark_write(response: Response) -> None:
+    """Pin the client's reads to data at least as new as this write"""
+
+    now = f"{time.time():.6f}"
+
+    response.headers[LAST_WRITE_HEADER] = now
+    response.set_cookie(
+        LAST_WRITE_COOKIE, now, max_age=LAST_WRITE_WINDOW, httponly=True
     )
 
-    async with Session() as session:
-        yield session 
+
+def wrote_recently(request: Request) -> bool:
+    """True while the client's last write may not be visible everywhere yet"""
+
+    return time.time() - _last_write(request) < LAST_WRITE_WINDOW
+
+
+def read_from_primary(request: Request) -> bool:
+    """True unless get_session gave this request a replica session"""
+
+    return getattr(request.state, "replica", None) is None
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Replica bound session for reads when one is usable, primary otherwise"""
+
+    session_factory = async_session
+
+    if request.method in READ_METHODS:
+        replica = replica_router.choose(_last_write(request))
+
+        if replica is not None:
+            session_factory = replica.session
+
+        # read back by handlers that must not cache what a replica served
+        request.state.replica = replica
+
+    async with session_factory() as session:
+        yield session
+
+
+async def get_primary_session() -> AsyncGenerator[AsyncSession, None]:
+    """For the few GET handlers that write"""
+
+    async with async_session() as session:
+        yield session
+
+
+def get_pool_stats() -> dict:
+    pool = primary.engine.pool
+
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkout_timeouts": InstrumentedPool.timeouts,
+        "checkout_wait_time": InstrumentedPool.wait_time.snapshot(),
+    }
@@ -3,7 +3,14 @@ from datetime import date, datetime
 from typing import List, Optional
 
 import sqlalchemy.dialects.postgresql as pg
-from sqlmodel import Column, Field, Relationship, SQLModel
+from sqlmodel import Column, Computed, Field, Index, Relationship, SQLModel
+
+
+BOOK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(publisher, '')), 'C')"
+)
 
 
 class User(SQLModel, table=True):
@@ -39,17 +46,26 @@ class User(SQLModel, table=True):
 
 
 class BookTag(SQLModel, table=True):
+    __table_args__ = (Index("ix_booktag_tag_id_book_id", "tag_id", "book_id"),)
+
     book_id: uuid.UUID = Field(default=None, foreign_key="books.uid", primary_key=True)
     tag_id: uuid.UUID = Field(default=None, foreign_key="tags.uid", primary_key=True)
 
 
 class Tag(SQLModel, table=True):
     __tablename__ = "tags"
+    __table_args__ = (
+        Index("ix_tags_created_at_uid", "created_at", "uid"),
+        Index("ux_tags_name", "name", unique=True),
+    )
+
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
     name: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
-    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
+    )
     books: List["Book"] = Relationship(
         link_model=BookTag,
         back_populates="tags",
@@ -62,6 +78,22 @@ class Tag(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        Index("ix_books_updated_at_uid", "updated_at", "uid"),
+        Index("ix_books_avg_rating_uid", "avg_rating", "uid"),
+        # full-text search document, maintained by postgres and never loaded
+        # into Book instances; query it through Book.__table__.c.search_vector
+        Column(
+            "search_vector",
+            pg.TSVECTOR,
+            Computed(BOOK_SEARCH_VECTOR, persisted=True),
+        ),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -72,7 +104,22 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
-    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    # review aggregates, kept in step by ReviewService in the review's transaction
+    review_count: int = Field(
+        default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0")
+    )
+    rating_sum: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+        exclude=True,
+    )
+    avg_rating: float = Field(
+        default=0,
+        sa_column=Column(pg.DOUBLE_PRECISION, nullable=False, server_default="0"),
+    )
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
+    )
     updated_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP, default=datetime.now)
     )  # Changed from update_at to updated_at
@@ -92,6 +139,12 @@ class Book(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_created_at_uid", "created_at", "uid"),
+        Index("ix_reviews_updated_at_uid", "updated_at", "uid"),
+        Index("ix_reviews_book_uid", "book_uid"),
+    )
+
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -99,7 +152,9 @@ class Review(SQLModel, table=True):
     review_text: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
     book_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="books.uid")
-    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
+    )
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     user: Optional[User] = Relationship(back_populates="reviews")
     book: Optional[Book] = Relationship(back_populates="reviews")
@@ -0,0 +1,117 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import lambda_stmt, tuple_
+from sqlmodel import desc
+from sqlmodel.sql.expression import SelectOfScalar
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.errors import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str]
+
+
+def _dump_cursor(values: list) -> str:
+    raw = json.dumps(values).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _load_cursor(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    """Encode the keyset position of a row as an opaque cursor"""
+
+    return _dump_cursor([created_at.isoformat(), str(uid)])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor produced by `encode_cursor`"""
+
+    try:
+        created_at, uid = _load_cursor(cursor)
+
+        return datetime.fromisoformat(created_at), uuid.UUID(uid)
+
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+def encode_rank_cursor(rank: float, uid: uuid.UUID) -> str:
+    """Encode the position of a row in a relevance ranked result"""
+
+    return _dump_cursor([rank, str(uid)])
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, uuid.UUID]:
+    """Decode a cursor produced by `encode_rank_cursor`"""
+
+    try:
+        rank, uid = _load_cursor(cursor)
+
+        return float(rank), uuid.UUID(uid)
+
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+async def paginate(
+    session: AsyncSession,
+    statement,
+    model,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    sort_key: str = "created_at",
+) -> dict:
+    """Run `statement` as one keyset page ordered by (sort_key, uid) descending.
+
+    `sort_key` is created_at or a numeric column. One extra row is fetched
+    to find out whether a next page exists, so no COUNT or OFFSET is ever
+    needed. Pass a statement built once at module level where possible: it
+    is wrapped in a lambda statement, so only its cache key is computed per
+    call and the keyset clauses below just rebind their values.
+    """
+
+    scalars = isinstance(statement, SelectOfScalar)
+    sort_column = getattr(model, sort_key)
+    uid_column = model.uid
+    fetch = limit + 1
+
+    if sort_key == "created_at":
+        encode, decode = encode_cursor, decode_cursor
+    else:
+        encode, decode = encode_rank_cursor, decode_rank_cursor
+
+    page = lambda_stmt(lambda: statement)
+
+    if cursor is not None:
+        value, uid = decode(cursor)
+        page += lambda s: s.where(tuple_(sort_column, uid_column) < tuple_(value, uid))
+
+    page += lambda s: s.order_by(desc(sort_column), desc(uid_column)).limit(fetch)
+
+    result = await session.exec(page)
+    rows = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode(getattr(rows[-1], sort_key), rows[-1].uid)
+
+    return {"items": rows, "next_cursor": next_cursor}
@@ -1,18 +1,18 @@
+from functools import lru_cache
+
 import redis.asyncio as aioredis
 
 from src.config import Config
 
-JTI_EXPIRY = 360
-
-
-token_blocklist = aioredis.from_url(Config.REDIS_URL)
-
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+@lru_cache(maxsize=None)
+def get_redis() -> aioredis.Redis:
+    """The worker's redis client, created on first use and closed by the lifespan"""
 
+    return aioredis.from_url(Config.REDIS_URL)
 
-async def check_jti_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
 
-    return jti is not None
+async def close_redis() -> None:
+    if get_redis.cache_info().currsize:
+        await get_redis().aclose()
+        get_redis.cache_clear()
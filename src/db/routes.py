@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+
+from src.auth.dependencies import RoleChecker
+from src.db.main import get_pool_stats, replica_router
+
+db_router = APIRouter(dependencies=[Depends(RoleChecker(["admin"]))])
+
+
+@db_router.get("/pool/stats")
+async def get_db_pool_stats():
+    return get_pool_stats()
+
+
+@db_router.get("/replicas/stats")
+async def get_replica_stats():
+    return replica_router.stats()
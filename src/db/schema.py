@@ -0,0 +1,83 @@
+import ast
+from pathlib import Path
+from typing import Set
+
+from sqlalchemy import inspect, text
+
+from src.db.main import primary
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations" / "versions"
+
+CURRENT_REVISION_QUERY = text("SELECT version_num FROM alembic_version")
+
+
+class SchemaOutdated(RuntimeError):
+    pass
+
+
+def _revision_ids(value) -> Set[str]:
+    if value is None:
+        return set()
+
+    if isinstance(value, str):
+        return {value}
+
+    return set(value)
+
+
+def alembic_heads(versions_dir: Path = MIGRATIONS_DIR) -> Set[str]:
+    """Head revisions of the migration scripts.
+
+    Reads the `revision` and `down_revision` assignments straight from the
+    files: loading alembic's ScriptDirectory costs more than the rest of
+    startup put together.
+    """
+
+    revisions: Set[str] = set()
+    parents: Set[str] = set()
+
+    for path in versions_dir.glob("*.py"):
+        assignments = {}
+
+        for node in ast.parse(path.read_text()).body:
+            if isinstance(node, ast.AnnAssign) and node.value is not None:
+                targets, value = [node.target], node.value
+            elif isinstance(node, ast.Assign):
+                targets, value = node.targets, node.value
+            else:
+                continue
+
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id in (
+                    "revision",
+                    "down_revision",
+                ):
+                    assignments[target.id] = ast.literal_eval(value)
+
+        if "revision" in assignments:
+            revisions.add(assignments["revision"])
+            parents |= _revision_ids(assignments.get("down_revision"))
+
+    return revisions - parents
+
+
+async def check_schema() -> None:
+    """Refuse to serve against a database that is not at the Alembic head"""
+
+    heads = alembic_heads()
+
+    async with primary.engine.connect() as conn:
+        migrated = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table("alembic_version")
+        )
+        current = (
+            set((await conn.execute(CURRENT_REVISION_QUERY)).scalars())
+            if migrated
+            else set()
+        )
+
+    if current != heads:
+        raise SchemaOutdated(
+            f"database is at {sorted(current) or 'no revision'}, migrations "
+            f"are at {sorted(heads)}; run `alembic upgrade head`"
+        )
@@ -76,6 +76,30 @@ class UserNotFound(BooklyException):
     pass
 
 
+class InvalidCursor(BooklyException):
+    """User has provided a pagination cursor that cannot be decoded"""
+
+    pass
+
+
+class InvalidFields(BooklyException):
+    """User has requested a field that cannot be selected"""
+
+    pass
+
+
+class ImportJobNotFound(BooklyException):
+    """Book import job Not found"""
+
+    pass
+
+
+class PasswordHasherBusy(BooklyException):
+    """Too many password hashes are already running or queued"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
     pass
@@ -217,6 +241,53 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "resolution": "Use the next_cursor returned by the previous page",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidFields,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid fields requested",
+                "resolution": "Pass a comma separated list of book fields",
+                "error_code": "invalid_fields",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ImportJobNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Import job not found",
+                "error_code": "import_job_not_found",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        PasswordHasherBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy",
+                "resolution": "Please try again in a moment",
+                "error_code": "server_busy",
+            },
+        ),
+    )
+
     app.add_exception_handler(
         AccountNotVerified,
         create_exception_handler(
@@ -0,0 +1,50 @@
+import hashlib
+from typing import Iterable, Sequence
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that version a representation"""
+
+    raw = "|".join("" if part is None else str(part) for part in parts)
+
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"'
+
+
+def page_etag(page: dict, fields: Sequence[str] = ("uid", "updated_at")) -> str:
+    """ETag of a list page, built from the version fields of every item"""
+
+    parts = []
+    for item in page["items"]:
+        for name in fields:
+            parts.append(item[name] if isinstance(item, dict) else getattr(item, name))
+
+    return make_etag(page["next_cursor"], *parts)
+
+
+def _tags(header: str) -> Iterable[str]:
+    for tag in header.split(","):
+        tag = tag.strip()
+        yield tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names `etag`"""
+
+    header = request.headers.get("if-none-match")
+
+    if not header:
+        return False
+
+    return header.strip() == "*" or etag in _tags(header)
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
@@ -1,5 +1,4 @@
-from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
-
+from functools import lru_cache
 from pathlib import Path
 
 from src.config import Config
@@ -8,27 +7,44 @@ from src.config import Config
 BASE_DIR = Path(__file__).resolve().parent
 
 
-mail_config = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_PORT=Config.MAIL_PORT,
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(BASE_DIR, "templates"),
-)
+# fastapi_mail pulls in its template and validation stack, so it is only
+# imported once the first mail is sent
+
+
+@lru_cache(maxsize=None)
+def get_mail():
+    from fastapi_mail import ConnectionConfig, FastMail
+
+    mail_config = ConnectionConfig(
+        MAIL_USERNAME=Config.MAIL_USERNAME,
+        MAIL_PASSWORD=Config.MAIL_PASSWORD,
+        MAIL_FROM=Config.MAIL_FROM,
+        MAIL_PORT=Config.MAIL_PORT,
+        MAIL_SERVER=Config.MAIL_SERVER,
+        MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True,
+        TEMPLATE_FOLDER=Path(BASE_DIR, "templates"),
+    )
 
-mail = FastMail(config=mail_config)
+    return FastMail(config=mail_config)
 
 
 def create_message(recipients: list[str], subject: str, body: str):
+    from fastapi_mail import MessageSchema, MessageType
 
     message = MessageSchema(
         recipients=recipients, subject=subject, body=body, subtype=MessageType.html
     )
 
     return message
+
+
+def queue_email(recipients: list[str], subject: str, body: str) -> None:
+    """Hand the mail to the Celery worker, loading the Celery app on first use"""
+
+    from src.celery_tasks import send_email
+
+    send_email.delay(recipients, subject, body)
@@ -7,6 +7,9 @@ from fastapi.responses import JSONResponse
 import time
 import logging
 
+from src.access import access_log
+from src.db.main import READ_METHODS, mark_write
+
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
@@ -15,14 +18,21 @@ def register_middleware(app: FastAPI):
 
     @app.middleware("http")
     async def custom_loggin(request: Request, call_next):
-        start_time = time.time()
+        started = time.perf_counter_ns()
+
+        response = await call_next(request)
+
+        access_log.log(request, response.status_code, time.perf_counter_ns() - started)
 
+        return response
+
+    @app.middleware("http")
+    async def read_your_writes(request: Request, call_next):
         response = await call_next(request)
-        end_time = time.time() - start_time
 
-        message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} - {end_time}s"
+        if request.method not in READ_METHODS and response.status_code < 400:
+            mark_write(response)
 
-        print(message)
         return response
     
     # @app.middleware("http")
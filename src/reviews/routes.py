@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.auth.dependencies import RoleChecker, get_current_user
+from src.auth.dependencies import RoleChecker, get_current_principal
+from src.auth.schemas import Principal
+from src.db.export import NDJSON_MEDIA_TYPE, stream_ndjson
 from src.db.main import get_session
-from src.db.models import User
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
 from src.errors import BookNotFound
+from src.etag import cache_headers, etag_matches, make_etag, not_modified, page_etag
 
-from .schemas import ReviewCreateModel
+from .schemas import ReviewCreateModel, ReviewResponseModel
 from .service import ReviewService
 
 review_service = ReviewService()
@@ -15,30 +22,69 @@ admin_role_checker = Depends(RoleChecker(["admin"]))
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
-@review_router.get("/", dependencies=[admin_role_checker])
-async def get_all_reviews(session: AsyncSession = Depends(get_session)):
-    books = await review_service.get_all_reviews(session)
+@review_router.get(
+    "/", response_model=Page[ReviewResponseModel], dependencies=[admin_role_checker]
+)
+async def get_all_reviews(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    books = await review_service.get_all_reviews(session, limit, cursor)
+    etag = page_etag(books)
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
+    response.headers.update(cache_headers(etag))
     return books
 
 
-@review_router.get("/{review_uid}", dependencies=[user_role_checker])
-async def get_review(review_uid: str, session: AsyncSession = Depends(get_session)):
+@review_router.get("/export", dependencies=[admin_role_checker])
+async def export_reviews(updated_since: Optional[datetime] = None):
+    statement = review_service.export_reviews_statement(updated_since)
+
+    return StreamingResponse(
+        stream_ndjson(statement, ReviewResponseModel), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@review_router.get(
+    "/{review_uid}",
+    response_model=ReviewResponseModel,
+    dependencies=[user_role_checker],
+)
+async def get_review(
+    review_uid: str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+):
     book = await review_service.get_review(review_uid, session)
 
     if not book:
         raise BookNotFound()
 
+    etag = make_etag(book.uid, book.updated_at)
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers.update(cache_headers(etag))
+    return book
+
 
 @review_router.post("/book/{book_uid}", dependencies=[user_role_checker])
 async def add_review_to_books(
     book_uid: str,
     review_data: ReviewCreateModel,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     new_review = await review_service.add_review_to_book(
-        user_email=current_user.email,
+        user_uid=principal.uid,
         review_data=review_data,
         book_uid=book_uid,
         session=session,
@@ -54,11 +100,11 @@ async def add_review_to_books(
 )
 async def delete_review(
     review_uid: str,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     await review_service.delete_review_to_from_book(
-        review_uid=review_uid, user_email=current_user.email, session=session
+        review_uid=review_uid, user_uid=principal.uid, session=session
     )
 
     return None
\ No newline at end of file
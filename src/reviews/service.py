@@ -1,46 +1,59 @@
 import logging
+from datetime import datetime
+from typing import Optional
 
 from fastapi import status
 from fastapi.exceptions import HTTPException
-from sqlmodel import desc, select
+from sqlalchemy import lambda_stmt
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.auth.service import UserService
+from src.books.cache import invalidate_book
+from src.books.leaderboard import record_review, remove_review
 from src.books.service import BookService
+from src.db.export import naive_utc
 from src.db.models import Review
-from src.errors import BookNotFound, UserNotFound
+from src.db.pagination import DEFAULT_PAGE_SIZE, paginate
+from src.errors import BookNotFound
 
-from .schemas import ReviewCreateModel
+from .schemas import ReviewCreateModel, ReviewResponseModel
 
 book_service = BookService()
-user_service = UserService()
+
+ALL_REVIEWS = select(Review)
+
+
+def review_by_uid_statement(review_uid: str):
+    return lambda_stmt(lambda: select(Review).where(Review.uid == review_uid))
 
 
 class ReviewService:
     async def add_review_to_book(
         self,
-        user_email: str,
+        user_uid: str,
         book_uid: str,
         review_data: ReviewCreateModel,
         session: AsyncSession,
     ):
         try:
             book = await book_service.get_book(book_uid=book_uid, session=session)
-            user = await user_service.get_user_by_email(
-                email=user_email, session=session
-            )
             review_data_dict = review_data.model_dump()
             if not book:
                 raise BookNotFound()
 
-            if not user:
-                raise UserNotFound()
-
-            new_review = Review(**review_data_dict, user=user, book=book)
+            # the principal's uid is enough, the user row is never loaded
+            new_review = Review(**review_data_dict, user_uid=user_uid, book=book)
 
             session.add(new_review)
+            await book_service.apply_review_to_book(
+                book_uid, new_review.rating, 1, session
+            )
 
             await session.commit()
+            await invalidate_book(book_uid)
+            # the book's own uid, not the path string, so every spelling of
+            # a uid maps to the one zset member
+            await record_review(str(book.uid), new_review.rating, new_review.created_at)
 
             return new_review
 
@@ -52,32 +65,50 @@ class ReviewService:
             )
 
     async def get_review(self, review_uid: str, session: AsyncSession):
-        statement = select(Review).where(Review.uid == review_uid)
+        result = await session.exec(review_by_uid_statement(review_uid))
+
+        return result.scalars().first()
 
-        result = await session.exec(statement)
+    async def get_all_reviews(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        return await paginate(session, ALL_REVIEWS, Review, limit, cursor)
 
-        return result.first()
+    def export_reviews_statement(self, updated_since: Optional[datetime] = None):
+        """Column-only select of every review, oldest change first"""
 
-    async def get_all_reviews(self, session: AsyncSession):
-        statement = select(Review).order_by(desc(Review.created_at))
+        statement = select(
+            *(getattr(Review, name) for name in ReviewResponseModel.model_fields)
+        )
 
-        result = await session.exec(statement)
+        if updated_since is not None:
+            statement = statement.where(Review.updated_at >= naive_utc(updated_since))
 
-        return result.all()
+        return statement.order_by(Review.updated_at, Review.uid)
 
     async def delete_review_to_from_book(
-        self, review_uid: str, user_email: str, session: AsyncSession
+        self, review_uid: str, user_uid: str, session: AsyncSession
     ):
-        user = await user_service.get_user_by_email(user_email, session)
-
         review = await self.get_review(review_uid, session)
 
-        if not review or (review.user != user):
+        if not review or review.user_uid != user_uid:
             raise HTTPException(
                 detail="Cannot delete this review",
                 status_code=status.HTTP_403_FORBIDDEN,
             )
 
-        session.delete(review)
+        await session.delete(review)
+
+        if review.book_uid is not None:
+            await book_service.apply_review_to_book(
+                review.book_uid, review.rating, -1, session
+            )
+
+        await session.commit()
 
-        await session.commit()
\ No newline at end of file
+        if review.book_uid is not None:
+            await invalidate_book(review.book_uid)
+            await remove_review(review.book_uid, review.rating, review.created_at)
\ No newline at end of file
@@ -1,12 +1,14 @@
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 from src.auth.dependencies import RoleChecker
 from src.books.schemas import Book
 from src.db.main import get_session
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+from src.etag import cache_headers, etag_matches, not_modified, page_etag
 
 from .schemas import TagAddModel, TagCreateModel, TagModel
 from .service import TagService
@@ -16,9 +18,23 @@ tag_service = TagService()
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
-@tags_router.get("/", response_model=List[TagModel], dependencies=[user_role_checker])
-async def get_all_tags(session: AsyncSession = Depends(get_session)):
-    tags = await tag_service.get_tags(session)
+@tags_router.get("/", response_model=Page[TagModel], dependencies=[user_role_checker])
+async def get_all_tags(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    tags = await tag_service.get_tags(session, limit, cursor)
+
+    # tags have no updated_at, the name is the only mutable field
+    etag = page_etag(tags, fields=("uid", "name"))
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers.update(cache_headers(etag))
 
     return tags
 
@@ -1,16 +1,29 @@
+from typing import Optional
+
 from fastapi import status
 from fastapi.exceptions import HTTPException
-from sqlmodel import desc, select
+from sqlalchemy import lambda_stmt, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import noload
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.books.cache import invalidate_book
 from src.books.service import BookService
 from src.db.models import Tag
+from src.db.pagination import DEFAULT_PAGE_SIZE, paginate
 from src.errors import BookNotFound, TagAlreadyExists, TagNotFound 
 
 from .schemas import TagAddModel, TagCreateModel
 
 book_service = BookService()
 
+ALL_TAGS = select(Tag).options(noload(Tag.books))
+
+
+def tag_by_uid_statement(tag_uid: str):
+    return lambda_stmt(lambda: select(Tag).where(Tag.uid == tag_uid))
+
 
 server_error = HTTPException(
     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Something went wrong"
@@ -19,14 +32,15 @@ server_error = HTTPException(
 
 class TagService:
 
-    async def get_tags(self, session: AsyncSession):
-        """Get all tags"""
-
-        statement = select(Tag).order_by(desc(Tag.created_at))
-
-        result = await session.exec(statement)
+    async def get_tags(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        """Get a page of tags"""
 
-        return result.all()
+        return await paginate(session, ALL_TAGS, Tag, limit, cursor)
 
     async def add_tags_to_book(
         self, book_uid: str, tag_data: TagAddModel, session: AsyncSession
@@ -48,17 +62,16 @@ class TagService:
             book.tags.append(tag)
         session.add(book)
         await session.commit()
+        await invalidate_book(book_uid)
         await session.refresh(book)
         return book
 
     async def get_tag_by_uid(self, tag_uid: str, session: AsyncSession):
         """Get tag by uid"""
 
-        statement = select(Tag).where(Tag.uid == tag_uid)
-
-        result = await session.exec(statement)
+        result = await session.exec(tag_by_uid_statement(tag_uid))
 
-        return result.first()
+        return result.scalars().first()
 
     async def add_tag(self, tag_data: TagCreateModel, session: AsyncSession):
         """Create a tag"""
@@ -85,21 +98,31 @@ class TagService:
     ):
         """Update a tag"""
 
-        tag = await self.get_tag_by_uid(tag_uid, session)
+        update_data_dict = tag_update_data.model_dump(exclude_unset=True)
 
-        if not tag:
-            raise TagNotFound()
+        statement = (
+            update(Tag)
+            .where(Tag.uid == tag_uid)
+            .values(**update_data_dict)
+            .returning(Tag.uid, Tag.name, Tag.created_at)
+            .execution_options(synchronize_session=False)
+        )
 
-        update_data_dict = tag_update_data.model_dump()
+        try:
+            result = await session.exec(statement)
 
-        for k, v in update_data_dict.items():
-            setattr(tag, k, v)
+        except IntegrityError:
+            await session.rollback()
+            raise TagAlreadyExists()
 
-            await session.commit()
+        tag = result.first()
 
-            await session.refresh(tag)
+        if not tag:
+            raise TagNotFound()
+
+        await session.commit()
 
-        return tag
+        return dict(tag._mapping)
 
     async def delete_tag(self, tag_uid: str, session: AsyncSession):
         """Delete a tag"""
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8000/api/v1"
+
+# user0 is the admin created by `python -m src.tools.seed`
+DEFAULT_EMAIL = "user0@example.com"
+DEFAULT_PASSWORD = "password"
+
+SAMPLE_SIZE = 100
+
+
+class Scenario:
+    """One benchmarked route: how to build a request and whether it writes"""
+
+    def __init__(
+        self,
+        name: str,
+        method: str,
+        path: Callable[[random.Random], str],
+        body: Optional[Callable[[random.Random], dict]] = None,
+        writes: bool = False,
+        token: str = "access",
+    ):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.writes = writes
+        self.token = token
+
+
+class Benchmark:
+    """Drive every router of the app over HTTP and measure each route.
+
+    Each scenario runs on its own for a fixed duration with `concurrency`
+    workers sharing one connection pool. Latencies are measured client side
+    from send to the end of the body and only successful (2xx/304)
+    responses count towards them.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.tokens: Dict[str, str] = {}
+        self.samples: Dict[str, List[str]] = {}
+
+    async def _login(self, client: httpx.AsyncClient) -> None:
+        response = await client.post(
+            "/auth/login",
+            json={"email": self.args.email, "password": self.args.password},
+        )
+        response.raise_for_status()
+
+        self.tokens = {
+            "access": response.json()["access_token"],
+            "refresh": response.json()["refresh_token"],
+        }
+
+    async def _sample(self, client: httpx.AsyncClient, path: str) -> List[str]:
+        response = await client.get(
+            path,
+            params={"limit": SAMPLE_SIZE},
+            headers=self._headers("access"),
+        )
+        response.raise_for_status()
+
+        uids = [item["uid"] for item in response.json()["items"]]
+
+        if not uids:
+            raise SystemExit(f"{path} returned nothing, seed the database first")
+
+        return uids
+
+    def _headers(self, token: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[token]}"}
+
+    def scenarios(self) -> List[Scenario]:
+        books = lambda rng: rng.choice(self.samples["books"])
+        reviews = lambda rng: rng.choice(self.samples["reviews"])
+        words = ("river", "night", "garden", "empire", "shadow", "winter")
+
+        return [
+            Scenario("books:list", "GET", lambda rng: "/books/"),
+            Scenario("books:list_by_rating", "GET", lambda rng: "/books/?sort=rating"),
+            Scenario("books:user_books", "GET", lambda rng: "/books/user-books"),
+            Scenario(
+                "books:search",
+                "GET",
+                lambda rng: f"/books/search?q={rng.choice(words)}",
+            ),
+            Scenario(
+                "books:batch",
+                "GET",
+                lambda rng: "/books/batch?"
+                + "&".join(f"ids={books(rng)}" for _ in range(10)),
+            ),
+            Scenario("books:browse", "GET", lambda rng: "/books/browse"),
+            Scenario("books:leaderboard", "GET", lambda rng: "/books/leaderboard"),
+            Scenario("books:detail", "GET", lambda rng: f"/books/{books(rng)}"),
+            Scenario("reviews:list", "GET", lambda rng: "/reviews/"),
+            Scenario("reviews:detail", "GET", lambda rng: f"/reviews/{reviews(rng)}"),
+            Scenario("tags:list", "GET", lambda rng: "/tags/"),
+            Scenario("auth:me", "GET", lambda rng: "/auth/me"),
+            Scenario(
+                "auth:refresh_token",
+                "GET",
+                lambda rng: "/auth/refresh_token",
+                token="refresh",
+            ),
+            Scenario(
+                "auth:login",
+                "POST",
+                lambda rng: "/auth/login",
+                body=lambda rng: {
+                    "email": self.args.email,
+                    "password": self.args.password,
+                },
+                token=None,
+            ),
+            Scenario(
+                "books:create",
+                "POST",
+                lambda rng: "/books/",
+                body=lambda rng: {
+                    "title": f"Bench {rng.random()}",
+                    "author": "Bench",
+                    "publisher": "Bench",
+                    "published_date": "2020-01-01",
+                    "page_count": 300,
+                    "language": "English",
+                },
+                writes=True,
+            ),
+            Scenario(
+                "reviews:create",
+                "POST",
+                lambda rng: f"/reviews/book/{books(rng)}",
+                body=lambda rng: {
+                    "rating": rng.randint(0, 4),
+                    "review_text": "Benchmark review.",
+                },
+                writes=True,
+            ),
+            Scenario(
+                "tags:create",
+                "POST",
+                lambda rng: "/tags/",
+                body=lambda rng: {"name": f"bench-{rng.getrandbits(64):x}"},
+                writes=True,
+            ),
+        ]
+
+    async def _worker(
+        self,
+        client: httpx.AsyncClient,
+        scenario: Scenario,
+        rng: random.Random,
+        warmup_until: float,
+        deadline: float,
+        latencies: List[int],
+        statuses: Dict[int, int],
+    ) -> None:
+        headers = self._headers(scenario.token) if scenario.token else {}
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+
+            body = scenario.body(rng) if scenario.body else None
+            started = time.perf_counter_ns()
+
+            try:
+                response = await client.request(
+                    scenario.method, scenario.path(rng), json=body, headers=headers
+                )
+                status = response.status_code
+
+            except httpx.HTTPError:
+                status = 0
+
+            elapsed = time.perf_counter_ns() - started
+
+            if now < warmup_until:
+                continue
+
+            statuses[status] = statuses.get(status, 0) + 1
+            if 200 <= status < 300 or status == 304:
+                latencies.append(elapsed)
+
+    async def run_scenario(self, client: httpx.AsyncClient, scenario: Scenario) -> dict:
+        latencies: List[int] = []
+        statuses: Dict[int, int] = {}
+
+        started = time.perf_counter()
+        warmup_until = started + self.args.warmup
+        deadline = warmup_until + self.args.duration
+
+        await asyncio.gather(
+            *(
+                self._worker(
+                    client,
+                    scenario,
+                    random.Random(self.rng.random()),
+                    warmup_until,
+                    deadline,
+                    latencies,
+                    statuses,
+                )
+                for _ in range(self.args.concurrency)
+            )
+        )
+
+        measured = time.perf_counter() - warmup_until
+        requests = sum(statuses.values())
+        result = {
+            "requests": requests,
+            "errors": requests - len(latencies),
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+            "throughput_rps": round(len(latencies) / measured, 2),
+        }
+
+        if latencies:
+            p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) / 1e6
+            result.update(
+                p50_ms=round(p50, 3),
+                p95_ms=round(p95, 3),
+                p99_ms=round(p99, 3),
+                max_ms=round(max(latencies) / 1e6, 3),
+            )
+
+        return result
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(
+            max_connections=self.args.concurrency,
+            max_keepalive_connections=self.args.concurrency,
+        )
+
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url, limits=limits, timeout=self.args.timeout
+        ) as client:
+            await self._login(client)
+            self.samples = {
+                "books": await self._sample(client, "/books/"),
+                "reviews": await self._sample(client, "/reviews/"),
+            }
+
+            routes = {}
+            for scenario in self.scenarios():
+                if scenario.writes and not self.args.writes:
+                    continue
+                if self.args.routes and not any(
+                    scenario.name.startswith(prefix) for prefix in self.args.routes
+                ):
+                    continue
+
+                routes[scenario.name] = await self.run_scenario(client, scenario)
+                print(_format_row(scenario.name, routes[scenario.name]), file=sys.stderr)
+
+        return {
+            "meta": {
+                "started_at": datetime.now().isoformat(),
+                "base_url": self.args.base_url,
+                "concurrency": self.args.concurrency,
+                "duration_s": self.args.duration,
+                "warmup_s": self.args.warmup,
+                "seed": self.args.seed,
+                "python": platform.python_version(),
+            },
+            "routes": routes,
+        }
+
+
+def _format_row(name: str, result: dict) -> str:
+    if "p50_ms" not in result:
+        return f"{name:<24} no successful requests {result['statuses']}"
+
+    return (
+        f"{name:<24} {result['throughput_rps']:>9.1f} rps  "
+        f"p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+        f"p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+    )
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Routes whose p95 grew or throughput fell by more than `tolerance`"""
+
+    regressions = []
+
+    for name, result in report["routes"].items():
+        before = baseline["routes"].get(name)
+
+        if not before or "p95_ms" not in before:
+            continue
+
+        if "p95_ms" not in result:
+            regressions.append(f"{name}: no successful requests")
+            continue
+
+        p95 = result["p95_ms"] / before["p95_ms"] - 1
+        rps = result["throughput_rps"] / before["throughput_rps"] - 1
+
+        print(f"{name:<24} p95 {p95:+7.1%}  throughput {rps:+7.1%}", file=sys.stderr)
+
+        if p95 > tolerance or rps < -tolerance:
+            regressions.append(f"{name}: p95 {p95:+.1%}, throughput {rps:+.1%}")
+
+    return regressions
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Per-route HTTP benchmark of Bookly")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--email", default=DEFAULT_EMAIL)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--duration", type=float, default=10, help="measured seconds per route"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=2, help="unmeasured seconds per route"
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--routes", nargs="*", help="only run routes starting with these names"
+    )
+    parser.add_argument(
+        "--writes", action="store_true", help="also run routes that insert rows"
+    )
+    parser.add_argument("--output", help="write the JSON report here, default stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="allowed relative p95/throughput regression before exiting 1",
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = _parser().parse_args()
+    report = asyncio.run(Benchmark(args).run())
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+
+        if regressions:
+            print("regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
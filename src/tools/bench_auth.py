@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import time
+
+from starlette.requests import Request
+
+from src.auth.dependencies import AccessTokenBearer
+from src.auth.utils import create_access_token, decode_token
+from src.db.blocklist import check_jti_in_blocklist
+from src.db.redis import close_redis
+
+# a `GET /books/` passes through two bearers: the router's RoleChecker ->
+# get_current_user one and the route's own access_token_bearer
+BEARERS_PER_REQUEST = 2
+
+
+def _request(token: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/books/",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+    )
+
+
+async def per_bearer(token: str) -> None:
+    """What every bearer used to do on its own: two decodes and a blocklist read"""
+
+    for _ in range(BEARERS_PER_REQUEST):
+        token_data = decode_token(token)
+        decode_token(token)
+        await check_jti_in_blocklist(token_data["jti"])
+
+
+async def shared(token: str, bearers: list) -> None:
+    request = _request(token)
+
+    for bearer in bearers:
+        await bearer(request)
+
+
+async def _time(requests: int, call) -> float:
+    started = time.perf_counter_ns()
+
+    for _ in range(requests):
+        await call()
+
+    return (time.perf_counter_ns() - started) / requests / 1000
+
+
+async def main(requests: int) -> None:
+    token = create_access_token(
+        user_data={"email": "bench@example.com", "user_uid": "bench", "role": "user"}
+    )
+    bearers = [AccessTokenBearer() for _ in range(BEARERS_PER_REQUEST)]
+
+    # warm up the redis connection pool
+    await shared(token, bearers)
+
+    before = await _time(requests, lambda: per_bearer(token))
+    after = await _time(requests, lambda: shared(token, bearers))
+
+    print(f"per bearer: 4 decodes, 2 blocklist reads  {before:8.1f} us/request")
+    print(f"shared:     <=1 decode, 1 blocklist read  {after:8.1f} us/request")
+    print(f"saved {before - after:.1f} us/request ({1 - after / before:.0%})")
+
+    await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark of per-request token verification"
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests))
@@ -0,0 +1,124 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter_ns(); import src; "
+    "print(time.perf_counter_ns() - started)"
+)
+
+POLL_INTERVAL = 0.005
+
+
+def import_time() -> float:
+    """Milliseconds to import the app in a fresh interpreter"""
+
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+
+    return int(output.strip().splitlines()[-1]) / 1e6
+
+
+def time_to_first_request(port: int, path: str, timeout: float) -> float:
+    """Milliseconds from spawning a uvicorn worker until it first answers `path`.
+
+    Covers interpreter start, imports and the lifespan startup, which is
+    what a freshly autoscaled worker pays before it can take traffic.
+    """
+
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ]
+    )
+
+    try:
+        with httpx.Client() as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise SystemExit(f"server exited with {server.returncode}")
+
+                try:
+                    if client.get(url).status_code < 400:
+                        return (time.perf_counter() - started) * 1000
+
+                except httpx.TransportError:
+                    pass
+
+                time.sleep(POLL_INTERVAL)
+
+        raise SystemExit(f"no answer from {url} within {timeout}s")
+
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _summary(name: str, samples: list) -> dict:
+    result = {
+        "min_ms": round(min(samples), 1),
+        "median_ms": round(statistics.median(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+    print(
+        f"{name:<24} min {result['min_ms']:>8.1f}  median {result['median_ms']:>8.1f}  "
+        f"max {result['max_ms']:>8.1f} ms",
+        file=sys.stderr,
+    )
+
+    return result
+
+
+def main(args: argparse.Namespace) -> int:
+    imports = [import_time() for _ in range(args.runs)]
+    first_requests = [
+        time_to_first_request(args.port, args.path, args.timeout)
+        for _ in range(args.runs)
+    ]
+
+    _summary("import src", imports)
+    first_request = _summary("time to first request", first_requests)
+
+    if args.budget_ms and first_request["median_ms"] > args.budget_ms:
+        print(f"over the {args.budget_ms} ms startup budget", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import time and time to first request of a fresh worker"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--path", default="/api/v1/docs", help="first request, should not need auth"
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        help="exit 1 when the median time to first request exceeds this",
+    )
+    args = parser.parse_args()
+
+    sys.exit(main(args))
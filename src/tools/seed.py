@@ -0,0 +1,353 @@
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Sequence
+
+import numpy as np
+from sqlmodel import SQLModel, text
+
+from src.auth.utils import generate_password_hash
+from src.db.main import primary
+from src.db.models import Book, BookTag, Review, Tag, User
+
+SEED_CHUNK_SIZE = 50000
+
+# every timestamp is an offset back from this fixed point, so the same
+# seed always produces the same rows whenever it is run
+SEED_EPOCH = datetime(2026, 1, 1)
+SEED_SPAN = timedelta(days=3 * 365)
+
+LANGUAGES = ("English", "Spanish", "German", "French", "Italian", "Japanese", "Polish")
+LANGUAGE_WEIGHTS = (0.55, 0.12, 0.1, 0.09, 0.06, 0.05, 0.03)
+
+# ratings are 0 to 4, skewed positive like most review sites
+RATING_WEIGHTS = (0.05, 0.08, 0.17, 0.35, 0.35)
+
+WORDS = (
+    "silent river garden shadow winter letter house empire night city stone "
+    "light storm secret journey memory ocean crown forest glass fire island "
+    "road song war daughter king last lost hidden golden broken"
+).split()
+
+REVIEW_TEXTS = (
+    "Could not put it down.",
+    "Slow start, but the ending was worth it.",
+    "Not for me.",
+    "Beautifully written and well paced.",
+    "Good characters, weak plot.",
+    "A classic for a reason.",
+    "Too long by a hundred pages.",
+    "Read it twice already.",
+)
+
+
+class ZipfSampler:
+    """Draws indices 0..n-1 with P(rank k) proportional to 1 / k ** exponent.
+
+    Ranks are mapped to a random permutation, so popularity is not tied to
+    insertion order.
+    """
+
+    def __init__(self, n: int, exponent: float, rng: np.random.Generator):
+        cdf = np.cumsum(1.0 / np.arange(1, n + 1) ** exponent)
+        self.cdf = cdf / cdf[-1]
+        self.ranked = rng.permutation(n)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        ranks = np.searchsorted(self.cdf, rng.random(size), side="right")
+
+        return self.ranked[np.minimum(ranks, len(self.cdf) - 1)]
+
+
+def _uids(rng: np.random.Generator, size: int) -> np.ndarray:
+    raw = np.frombuffer(rng.bytes(16 * size), np.uint8).reshape(size, 16).copy()
+    # stamp version 4 / RFC 4122 variant bits so they are ordinary uuid4s
+    raw[:, 6] = raw[:, 6] & 0x0F | 0x40
+    raw[:, 8] = raw[:, 8] & 0x3F | 0x80
+
+    return raw.view("V16").ravel()
+
+
+def _to_uuids(uids: np.ndarray) -> np.ndarray:
+    """uuid.UUID objects for asyncpg, as an object array so foreign keys
+    can be fancy-indexed without building new UUIDs for every row"""
+
+    return np.array([uuid.UUID(bytes=uid.tobytes()) for uid in uids], object)
+
+
+def _timestamps(rng: np.random.Generator, size: int, newer_than=None) -> list:
+    """Random datetimes in the seed span, each after `newer_than` if given"""
+
+    start = np.datetime64(SEED_EPOCH - SEED_SPAN, "us")
+    end = np.datetime64(SEED_EPOCH, "us")
+
+    if newer_than is None:
+        newer_than = np.full(size, start)
+
+    span = (end - newer_than).astype(np.int64)
+    offsets = (rng.random(size) * span).astype(np.int64)
+
+    return (newer_than + offsets.astype("timedelta64[us]")).tolist()
+
+
+def _chunks(total: int, chunk_size: int) -> Iterator[tuple]:
+    for start in range(0, total, chunk_size):
+        yield start, min(chunk_size, total - start)
+
+
+class Seeder:
+    """Generate a synthetic, skewed dataset and COPY it into postgres.
+
+    Everything derives from one seed. Reviews are generated chunk by chunk
+    from per-chunk seeds, twice: once to work out the book aggregates
+    before books are loaded and once to load them, so memory stays flat
+    no matter how many reviews are asked for.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.seeds = np.random.SeedSequence(args.seed)
+        self.rng = np.random.default_rng(self.seeds.spawn(1)[0])
+
+        self.user_uids = _to_uuids(_uids(self.rng, args.users))
+        self.book_uids = _to_uuids(_uids(self.rng, args.books))
+        self.tag_uids = _to_uuids(_uids(self.rng, args.tags))
+
+        self.book_created_at = None
+        self.popular_books = ZipfSampler(args.books, args.zipf, self.rng)
+        self.active_users = ZipfSampler(args.users, args.zipf, self.rng)
+        self.popular_tags = ZipfSampler(args.tags, args.zipf, self.rng)
+
+        self.review_seeds = self.seeds.spawn(-(-args.reviews // args.chunk_size))
+
+    async def _copy(self, connection, model: SQLModel, columns: Dict[str, Sequence]):
+        table = model.__table__
+        unknown = set(columns) - set(table.columns.keys())
+        assert not unknown, f"{table.name} has no columns {unknown}"
+
+        await connection.copy_records_to_table(
+            table.name, records=zip(*columns.values()), columns=list(columns)
+        )
+
+    async def seed_users(self, connection) -> None:
+        password_hash = generate_password_hash(self.args.password)
+
+        for start, size in _chunks(self.args.users, self.args.chunk_size):
+            created_at = _timestamps(self.rng, size)
+            numbers = range(start, start + size)
+
+            await self._copy(
+                connection,
+                User,
+                {
+                    "uid": self.user_uids[start : start + size].tolist(),
+                    "username": [f"user{n}" for n in numbers],
+                    "email": [f"user{n}@example.com" for n in numbers],
+                    "first_name": [f"First{n}" for n in numbers],
+                    "last_name": [f"Last{n}" for n in numbers],
+                    # user0 is an admin so admin-only routes can be benchmarked
+                    "role": ["admin" if n == 0 else "user" for n in numbers],
+                    "is_verified": [True] * size,
+                    "password_hash": [password_hash] * size,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                },
+            )
+
+    def _reviews(self, index: int, size: int) -> dict:
+        rng = np.random.default_rng(self.review_seeds[index])
+
+        return {
+            "book": self.popular_books.sample(rng, size),
+            "user": self.active_users.sample(rng, size),
+            "rating": rng.choice(len(RATING_WEIGHTS), size, p=RATING_WEIGHTS),
+            "text": rng.integers(0, len(REVIEW_TEXTS), size),
+            "rng": rng,
+        }
+
+    def book_aggregates(self) -> tuple:
+        counts = np.zeros(self.args.books, np.int64)
+        sums = np.zeros(self.args.books, np.int64)
+
+        for index, (_, size) in enumerate(
+            _chunks(self.args.reviews, self.args.chunk_size)
+        ):
+            reviews = self._reviews(index, size)
+            counts += np.bincount(reviews["book"], minlength=self.args.books)
+            sums += np.bincount(
+                reviews["book"], weights=reviews["rating"], minlength=self.args.books
+            ).astype(np.int64)
+
+        return counts, sums
+
+    async def seed_books(self, connection) -> None:
+        counts, sums = self.book_aggregates()
+        averages = np.divide(
+            sums, counts, out=np.zeros(len(counts)), where=counts > 0
+        )
+        owners = self.active_users.sample(self.rng, self.args.books)
+
+        rng = self.rng
+        created_at = []
+        for start, size in _chunks(self.args.books, self.args.chunk_size):
+            book_created_at = _timestamps(rng, size)
+            created_at.extend(book_created_at)
+
+            title_words = rng.integers(0, len(WORDS), (size, 3))
+            years = np.clip(np.rint(rng.normal(1995, 25, size)), 1800, 2025)
+            days = rng.integers(0, 365, size)
+            published = (years.astype(np.int64) - 1970).astype("datetime64[Y]")
+            published = published.astype("datetime64[D]") + days.astype("timedelta64[D]")
+            languages = rng.choice(len(LANGUAGES), size, p=LANGUAGE_WEIGHTS)
+            page_counts = np.maximum(np.rint(rng.lognormal(5.7, 0.5, size)), 1).astype(int)
+            authors = rng.integers(0, max(self.args.books // 5, 1), size)
+            publishers = rng.integers(0, max(self.args.books // 200, 1), size)
+            part = slice(start, start + size)
+
+            await self._copy(
+                connection,
+                Book,
+                {
+                    "uid": self.book_uids[part].tolist(),
+                    "title": [
+                        " ".join(WORDS[w] for w in words).title()
+                        for words in title_words
+                    ],
+                    "author": [f"Author {a}" for a in authors],
+                    "publisher": [f"Publisher {p}" for p in publishers],
+                    "published_date": published.tolist(),
+                    "page_count": page_counts.tolist(),
+                    "language": [LANGUAGES[i] for i in languages],
+                    "user_uid": self.user_uids[owners[part]].tolist(),
+                    "review_count": counts[part].tolist(),
+                    "rating_sum": sums[part].tolist(),
+                    "avg_rating": averages[part].tolist(),
+                    "created_at": book_created_at,
+                    "updated_at": book_created_at,
+                },
+            )
+
+        self.book_created_at = np.array(created_at, "datetime64[us]")
+
+    async def seed_reviews(self, connection) -> None:
+        for index, (_, size) in enumerate(
+            _chunks(self.args.reviews, self.args.chunk_size)
+        ):
+            reviews = self._reviews(index, size)
+            rng = reviews["rng"]
+            created_at = _timestamps(
+                rng, size, newer_than=self.book_created_at[reviews["book"]]
+            )
+
+            await self._copy(
+                connection,
+                Review,
+                {
+                    "uid": _to_uuids(_uids(rng, size)).tolist(),
+                    "rating": reviews["rating"].tolist(),
+                    "review_text": [REVIEW_TEXTS[i] for i in reviews["text"]],
+                    "user_uid": self.user_uids[reviews["user"]].tolist(),
+                    "book_uid": self.book_uids[reviews["book"]].tolist(),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                },
+            )
+
+    async def seed_tags(self, connection) -> None:
+        created_at = _timestamps(self.rng, self.args.tags)
+
+        await self._copy(
+            connection,
+            Tag,
+            {
+                "uid": self.tag_uids.tolist(),
+                "name": [f"tag-{n}" for n in range(self.args.tags)],
+                "created_at": created_at,
+            },
+        )
+
+        for start, size in _chunks(self.args.books, self.args.chunk_size):
+            per_book = self.rng.poisson(self.args.tags_per_book, size)
+            books = np.repeat(np.arange(start, start + size), per_book)
+            tags = self.popular_tags.sample(self.rng, len(books))
+
+            # a book can draw the same popular tag twice, links are unique
+            links = np.unique(books * self.args.tags + tags)
+            books, tags = np.divmod(links, self.args.tags)
+
+            await self._copy(
+                connection,
+                BookTag,
+                {
+                    "book_id": self.book_uids[books].tolist(),
+                    "tag_id": self.tag_uids[tags].tolist(),
+                },
+            )
+
+    async def run(self) -> None:
+        steps = (
+            ("users", self.seed_users),
+            ("books", self.seed_books),
+            ("reviews", self.seed_reviews),
+            ("tags", self.seed_tags),
+        )
+
+        async with primary.engine.begin() as conn:
+            if self.args.truncate:
+                tables = (BookTag, Review, Tag, Book, User)
+                await conn.execute(
+                    text(f"TRUNCATE {', '.join(m.__table__.name for m in tables)}")
+                )
+
+            raw_connection = await conn.get_raw_connection()
+            connection = raw_connection.driver_connection
+
+            for name, step in steps:
+                started = time.perf_counter()
+                await step(connection)
+                print(f"{name}: {time.perf_counter() - started:.1f}s")
+
+            # so the planner sees the new volumes straight away
+            await conn.execute(text("ANALYZE"))
+
+        await primary.dispose()
+
+        print(
+            "done, rebuild leaderboards with `python -m src.books.leaderboard --rebuild`"
+        )
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load a synthetic Bookly dataset")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=1000000)
+    parser.add_argument("--tags", type=int, default=2000)
+    parser.add_argument(
+        "--tags-per-book", type=float, default=3, help="mean tags per book"
+    )
+    parser.add_argument(
+        "--zipf", type=float, default=1.1, help="popularity skew exponent"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=SEED_CHUNK_SIZE)
+    parser.add_argument(
+        "--password", default="password", help="password of every seeded user"
+    )
+    parser.add_argument(
+        "--truncate", action="store_true", help="empty the tables before loading"
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = _parser().parse_args()
+
+    for name in ("users", "books", "tags"):
+        if getattr(args, name) < 1:
+            raise SystemExit(f"--{name} must be at least 1")
+
+    asyncio.run(Seeder(args).run())